@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import gc
 import logging
 from pathlib import Path
 from typing import Optional, List
 
-import pandas as pd
-
 from src.database.ops import (
     init_db,
-    append_rows_locked,
+    DBAppender,
+    build_duplicate_index,
+    document_digest,
+    file_stat_key,
     load_db,
+    load_file_index,
+    save_file_index,
     DEFAULT_COLUMNS,
+    INDEX_COLUMNS,
     extract_IPP_from_document,
     extract_IPP_from_path,
 )
@@ -21,6 +26,40 @@ from src.database.utils import resolve_eds_model_path, prepare_eds_registry
 
 logger = logging.getLogger(__name__)
 
+# Documents pseudonymized per model batch (their chunks go through one nlp.pipe call)
+PSEUDO_BATCH_SIZE = 8
+
+
+def _pseudonymize_batch(
+    pseudonymizer: TextPseudonymizer, items: list[dict]
+) -> list[Optional[str]]:
+    """
+    PSEUDO texts for *items* from one batched model call. If the batch fails, items
+    are retried one by one; those that still fail are logged and get None.
+    """
+    try:
+        return pseudonymizer.pseudonymize_batch(
+            [item["document"] for item in items],
+            ipps=[item["ipp"] for item in items],
+            keep_practitioner_names=True,
+        )
+    except Exception:
+        pass
+
+    pseudos: list[Optional[str]] = []
+    for item in items:
+        try:
+            pseudos.append(pseudonymizer.pseudonymize(
+                item["document"],
+                ipp=item["ipp"],
+                keep_practitioner_names=True,
+            ))
+        except Exception as e:
+            logger.error(f"[Pseudonymization] {item['path'].name}: {e}")
+            pseudos.append(None)
+    return pseudos
+
+
 def run_pseudonymization_cli(
     db_path: Path,
     pdf_paths: List[Path],
@@ -42,7 +81,13 @@ def run_pseudonymization_cli(
         logger.info(f"DB not found at {db_path}. Creating new DB.")
         init_db(db_path, columns=DEFAULT_COLUMNS)
     
-    df_db = load_db(db_path)
+    df_db = load_db(db_path, columns=INDEX_COLUMNS)
+    dup_index = build_duplicate_index(df_db)
+    file_index = load_file_index(db_path, df_db)
+    # Only the indexes are needed from here on: don't keep the whole DB (DOCUMENT
+    # texts included) alive next to the model during extraction/pseudonymization.
+    del df_db
+    gc.collect()
     salt = get_or_create_salt_file(db_path)
 
     # Initialize model
@@ -59,15 +104,28 @@ def run_pseudonymization_cli(
         logger.error(f"Failed to load EDS model: {e}")
         return
 
-    extractor = TextExtractor()
+    # Built on the first file that actually needs parsing (a re-run may skip them all)
+    extractor: Optional[TextExtractor] = None
 
     candidates: list[dict] = []
+    # (IPP, digest) of each candidate -> later copies of the same document in this
+    # run, counted as duplicates only once the candidate is committed
+    copies: dict[tuple[str, int], list[str]] = {}
     skipped = 0
     errors = 0
 
     # 1. Extraction Phase
     for p in pdf_paths:
         try:
+            # Same file as an already committed one: skipped without parsing it
+            stat = file_stat_key(p)
+            source_file = str(p.resolve())  # resolved once, reused as SOURCE_FILE
+            if file_index.get(source_file) == stat:
+                skipped += 1
+                continue
+
+            if extractor is None:
+                extractor = TextExtractor()
             text = extractor.pdf_to_text(p)
             if not text.strip():
                 raise ValueError("Empty extracted text")
@@ -77,15 +135,21 @@ def run_pseudonymization_cli(
             except Exception:
                 ipp = str(int(extract_IPP_from_path(p)))
 
-            # Check duplicate
-            is_dup = not df_db.empty and ((df_db["IPP"] == ipp) & (df_db["DOCUMENT"] == text)).any()
-            if is_dup:
+            # Check duplicate (against the DB, then earlier files of this run)
+            digest = document_digest(text)
+            if digest in dup_index[ipp]:
                 skipped += 1
+            elif (ipp, digest) in copies:
+                copies[(ipp, digest)].append(p.name)
             else:
+                copies[(ipp, digest)] = []
                 candidates.append({
                     "path": p,
+                    "source_file": source_file,
                     "ipp": ipp,
-                    "document": text
+                    "document": text,
+                    "digest": digest,
+                    "stat": stat,
                 })
         except Exception as e:
             logger.error(f"[Extraction] {p.name}: {e}")
@@ -95,60 +159,82 @@ def run_pseudonymization_cli(
         logger.info(f"No documents to commit. Skipped duplicates: {skipped}, Errors: {errors}")
         return
         
-    logger.info(f"Extract Phase Done. {len(candidates)} candidates, {skipped} skipped, {errors} errors.")
+    n_copies = sum(len(names) for names in copies.values())
+    logger.info(
+        f"Extract Phase Done. {len(candidates)} candidates, {skipped} skipped, "
+        f"{n_copies} repeated in this run, {errors} errors."
+    )
 
     # 2. Pseudonymization Phase
     pending_rows = []
-    pending_names = []
+    pending_items = []
     committed_files = []
+    skipped_copies = 0
+
+    def settle(item, committed):
+        """Count the candidate's later copies as duplicates, or log them if it failed."""
+        nonlocal skipped_copies
+        names = copies.pop((item["ipp"], item["digest"]), [])
+        if committed:
+            skipped_copies += len(names)
+            return
+        for name in names:
+            logger.error(f"[Commit] {name}: not committed (same document as {item['path'].name})")
 
     def flush_pending():
         if not pending_rows: return
         try:
-            append_rows_locked(db_path, pd.DataFrame(pending_rows))
-            committed_files.extend(pending_names)
+            appender.append(pending_rows)
+            committed_files.extend(item["path"].name for item in pending_items)
+            file_index.update(
+                (row_dict["SOURCE_FILE"], item["stat"])
+                for row_dict, item in zip(pending_rows, pending_items)
+            )
+            for item in pending_items:
+                settle(item, True)
         except Exception:
-            for row_dict, name in zip(pending_rows, pending_names):
+            for row_dict, item in zip(pending_rows, pending_items):
                 try:
-                    append_rows_locked(db_path, pd.DataFrame([row_dict]))
-                    committed_files.append(name)
+                    appender.append([row_dict])
+                    committed_files.append(item["path"].name)
+                    file_index[row_dict["SOURCE_FILE"]] = item["stat"]
+                    settle(item, True)
                 except Exception as row_err:
-                    logger.error(f"[Commit] {name}: {row_err}")
-
-    for i, item in enumerate(candidates, start=1):
-        p = item["path"]
-        try:
-            pseudo = pseudonymizer.pseudonymize(
-                item["document"],
-                ipp=item["ipp"],
-                keep_practitioner_names=True,
-            )
-
-            pending_rows.append({
-                "IPP": item["ipp"],
-                "SOURCE_FILE": str(p.resolve()),
-                "DOCUMENT": item["document"],
-                "PSEUDO": pseudo,
-                "ORDER": 1,
-            })
-            pending_names.append(p.name)
-
-            if len(pending_rows) >= chunk_size:
-                flush_pending()
-                pending_rows.clear()
-                pending_names.clear()
+                    logger.error(f"[Commit] {item['path'].name}: {row_err}")
+                    settle(item, False)
+
+    # One lock and one open DB file for the whole phase
+    with DBAppender(db_path) as appender:
+        for start in range(0, len(candidates), PSEUDO_BATCH_SIZE):
+            batch = candidates[start:start + PSEUDO_BATCH_SIZE]
+            for item, pseudo in zip(batch, _pseudonymize_batch(pseudonymizer, batch)):
+                if pseudo is None:
+                    settle(item, False)
+                    continue
+                pending_rows.append({
+                    "IPP": item["ipp"],
+                    "SOURCE_FILE": item["source_file"],
+                    "DOCUMENT": item["document"],
+                    "PSEUDO": pseudo,
+                    "ORDER": 1,
+                })
+                pending_items.append(item)
 
-        except Exception as e:
-            logger.error(f"[Pseudonymization] {p.name}: {e}")
+                if len(pending_rows) >= chunk_size:
+                    flush_pending()
+                    pending_rows.clear()
+                    pending_items.clear()
 
-    flush_pending()
+        flush_pending()
+        logger.info(
+            f"Committed {len(committed_files)} documents to {db_path} "
+            f"({skipped_copies} repeated copies skipped)."
+        )
 
-    logger.info(f"Committed {len(committed_files)} documents to {db_path}.")
+        if make_pseudo_only:
+            pseudo_only_path = db_path.with_name(f"{db_path.stem}_pseudo_only{db_path.suffix}")
+            appender.sync_pseudo_only_copy(pseudo_only_path)
+            logger.info(f"Saved pseudo-only copy to {pseudo_only_path}.")
 
-    if make_pseudo_only:
-        pseudo_only_path = db_path.with_name(f"{db_path.stem}_pseudo_only{db_path.suffix}")
-        df_full = load_db(db_path)
-        if "DOCUMENT" in df_full.columns:
-            df_full = df_full.drop(columns=["DOCUMENT"])
-        df_full.to_csv(pseudo_only_path, index=True)
-        logger.info(f"Saved pseudo-only copy to {pseudo_only_path}.")
+    if committed_files:
+        save_file_index(db_path, file_index)
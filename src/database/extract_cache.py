@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Texts extracted from PDFs, keyed by the SHA-256 of the file bytes, so that a PDF
+# committed again (copied, renamed, re-downloaded) costs a hash instead of a parse.
+# Opt-in. Only the texts of committed documents are stored (by the committer, once the
+# row is in the DB), so the cache holds no text the DB's DOCUMENT column did not
+# receive; it is kept next to the DB and removed with purge_cache().
+
+CACHE_SUFFIX = "_extract_cache.sqlite"
+
+TEXTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS texts (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+"""
+
+# Connections are per thread (sqlite3 objects cannot be shared between threads) and
+# reused across files within a pool worker.
+_LOCAL = threading.local()
+
+
+def cache_path(db_path: str | Path) -> Path:
+    p = Path(db_path)
+    return p.with_name(f"{p.stem}{CACHE_SUFFIX}")
+
+
+def purge_cache(db_path: str | Path) -> bool:
+    """
+    Delete *db_path*'s cache (database and WAL files). If a file is still open
+    elsewhere and cannot be removed (Windows), its texts are deleted instead.
+    Returns True if there was a cache.
+    """
+    path = cache_path(db_path)
+    files = [path, Path(f"{path}-wal"), Path(f"{path}-shm")]
+    if not any(f.exists() for f in files):
+        return False
+
+    # This thread's connection would keep the files open
+    cache = getattr(_LOCAL, "caches", {}).pop(str(path), None)
+    if cache is not None:
+        cache.close()
+
+    try:
+        for f in files:
+            if f.exists():
+                os.remove(f)
+    except OSError:
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            with conn:
+                conn.execute(TEXTS_TABLE_SQL)
+                conn.execute("DELETE FROM texts")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    return True
+
+
+def file_sha256(path: str | Path) -> str:
+    """Hex SHA-256 of the file's bytes (memory-mapped, not read into a buffer)."""
+    with open(path, "rb") as fh:
+        try:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+        except ValueError:
+            return hashlib.sha256(b"").hexdigest()  # empty file: cannot be mapped
+
+
+class ExtractCache:
+    """SQLite-backed map from file hash to extracted text."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")  # readers do not block the writer
+            conn.execute(TEXTS_TABLE_SQL)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT text FROM texts WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, text: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO texts(key, text) VALUES (?, ?)", (key, text)
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def cache_for(path: str | Path) -> ExtractCache:
+    """This thread's ExtractCache for *path* (opened on first use)."""
+    caches = getattr(_LOCAL, "caches", None)
+    if caches is None:
+        caches = _LOCAL.caches = {}
+    key = str(path)
+    cache = caches.get(key)
+    if cache is not None and not cache.path.exists():
+        cache.close()  # purged since: do not keep reading the deleted file
+        cache = None
+    if cache is None:
+        cache = caches[key] = ExtractCache(path)
+    return cache
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.database.ops import document_digest
+
+# Near-duplicate detection (re-scanned / re-exported PDFs whose text differs from the
+# stored one only by OCR or whitespace jitter), based on MinHash signatures of word
+# shingles. Duplicates are only looked for within one IPP, like the exact check, so a
+# new document is compared against the few signatures of its patient directly.
+
+NUM_PERM = 128
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.95
+
+SIDECAR_SUFFIX = "_minhash.npz"
+
+# Shingles hashed per step: bounds the (shingles x NUM_PERM) uint64 temporaries to a
+# few MB, whatever the document length (a long OCR report has ~100k shingles)
+_HASH_BLOCK = 4096
+
+_WORD_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures must stay comparable across runs (they are persisted)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+del _rng
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of the distinct word n-grams of *text* (case-insensitive)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {
+            " ".join(words[i : i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little")
+            for g in grams
+        ),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of *text*'s word shingles."""
+    hv = _shingle_hashes(text)
+    sig = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    # (a * h + b) mod p, truncated to 32 bits; uint64 wrap-around is part of the hash family
+    with np.errstate(over="ignore"):
+        for start in range(0, hv.size, _HASH_BLOCK):
+            phv = np.outer(hv[start : start + _HASH_BLOCK], _PERM_A)
+            phv += _PERM_B
+            phv %= _MERSENNE_PRIME
+            phv &= _MAX_HASH
+            np.minimum(sig, phv.min(axis=0), out=sig)
+    return sig.astype(np.uint32)
+
+
+def estimate_similarity(sig: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity between *sig* and each row of *others*."""
+    return (others == sig).mean(axis=1)
+
+
+def sidecar_path(db_path: str | Path) -> Path:
+    p = Path(db_path)
+    return p.with_name(f"{p.stem}{SIDECAR_SUFFIX}")
+
+
+class NearDuplicateIndex:
+    """
+    IPP -> MinHash signatures of the documents stored for it.
+
+    Signatures of DB rows are cached in '<db_stem>_minhash.npz', keyed by the digest
+    of the document text (a DID can be reused by another document once rows are
+    deleted), so only documents added since the previous commit are hashed when the
+    index is built.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD) -> None:
+        self.threshold = threshold
+        self._by_ipp: dict[str, list[np.ndarray]] = {}
+
+    def add(self, ipp: str, sig: np.ndarray) -> None:
+        self._by_ipp.setdefault(ipp, []).append(sig)
+
+    def find(self, ipp: str, sig: np.ndarray) -> Optional[float]:
+        """Best similarity >= threshold among *ipp*'s documents, else None."""
+        known = self._by_ipp.get(ipp)
+        if not known:
+            return None
+        best = float(estimate_similarity(sig, np.stack(known)).max())
+        return best if best >= self.threshold else None
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._by_ipp.values())
+
+    @classmethod
+    def for_db(
+        cls,
+        db_path: str | Path,
+        df: pd.DataFrame,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> "NearDuplicateIndex":
+        """
+        Build the index for the loaded DB *df*, reusing cached signatures and hashing
+        the rows missing from the cache. The cache is rewritten when it changed.
+        """
+        cached = _load_sidecar(sidecar_path(db_path))
+        current: dict[int, np.ndarray] = {}  # digest -> signature, for the DB's documents
+        sigs = np.empty((len(df), NUM_PERM), dtype=np.uint32)
+
+        missing = 0
+        for i, document in enumerate(df["DOCUMENT"]):
+            document = document if isinstance(document, str) else ""
+            digest = document_digest(document)
+            sig = current.get(digest)
+            if sig is None:
+                sig = cached.get(digest)
+                if sig is None:
+                    sig = minhash_signature(document)
+                    missing += 1
+                current[digest] = sig
+            sigs[i] = sig
+
+        if missing or len(cached) != len(current):
+            _save_sidecar(sidecar_path(db_path), current)
+
+        index = cls(threshold=threshold)
+        for ipp, sig in zip(df["IPP"].astype(str), sigs):
+            index.add(ipp, sig)
+        return index
+
+
+def _load_sidecar(path: Path) -> dict[int, np.ndarray]:
+    if not path.exists():
+        return {}
+    try:
+        with np.load(path) as data:
+            if data["signatures"].shape[1:] != (NUM_PERM,):
+                return {}
+            return dict(zip(data["digests"].tolist(), data["signatures"]))
+    except Exception:
+        return {}  # unreadable cache: rebuilt from the DB
+
+
+def _save_sidecar(path: Path, sigs: dict[int, np.ndarray]) -> None:
+    digests = np.fromiter(sigs, dtype=np.uint64, count=len(sigs))
+    signatures = (
+        np.stack(list(sigs.values())) if sigs else np.empty((0, NUM_PERM), dtype=np.uint32)
+    )
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(fh, digests=digests, signatures=signatures)
+    tmp.replace(path)
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from itertools import chain
 from pathlib import Path
 from typing import Optional
 
+import csv
+import hashlib
+import json
+import os
 import re
+import sqlite3
+import threading
 import pandas as pd
 import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+from src.database.extract_cache import cache_for, file_sha256
 from src.database.security import get_or_create_salt_file
 
 try:
@@ -17,8 +27,33 @@ try:
 except ImportError:
     portalocker = None
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_csv = None
+    pq = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 
 DEFAULT_COLUMNS = ["IPP", "SOURCE_FILE", "DOCUMENT", "PSEUDO", "ORDER"]
+# Columns the duplicate, near-duplicate and file indexes are built from (no PSEUDO)
+INDEX_COLUMNS = ["IPP", "SOURCE_FILE", "DOCUMENT"]
+
+# DBs whose path ends with this suffix are stored as zstd-compressed Parquet instead of CSV.
+PARQUET_SUFFIX = ".parquet"
+PARQUET_COMPRESSION = "zstd"
 
 # Helpers
 def _normalize_ipp(ipp) -> str:
@@ -57,6 +92,31 @@ def _atomic_write_csv(df: pd.DataFrame, path: Path) -> None:
     df.to_csv(tmp, index=True)
     tmp.replace(path)
 
+def is_parquet_db(path: str | Path) -> bool:
+    return Path(path).suffix.lower() == PARQUET_SUFFIX
+
+def _require_parquet() -> None:
+    if pq is None:
+        raise ImportError(
+            "pyarrow is required for Parquet databases.  Install with:  pip install pyarrow"
+        )
+
+def _atomic_write_parquet(df: pd.DataFrame, path: Path) -> None:
+    _require_parquet()
+    # Object columns may mix str/int/float (e.g. IPP before normalization); Parquet needs one type.
+    text_cols = [c for c in df.columns if df[c].dtype == object]
+    if text_cols:
+        df = df.astype({c: "string" for c in text_cols})
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    df.to_parquet(tmp, engine="pyarrow", compression=PARQUET_COMPRESSION, index=True)
+    tmp.replace(path)
+
+def _atomic_write_db(df: pd.DataFrame, path: Path) -> None:
+    if is_parquet_db(path):
+        _atomic_write_parquet(df, path)
+    else:
+        _atomic_write_csv(df, path)
+
 # DB funcs
 def init_db(path: str | Path, columns: Optional[list[str]] = None) -> Path:
     path = Path(path)
@@ -67,18 +127,33 @@ def init_db(path: str | Path, columns: Optional[list[str]] = None) -> Path:
 
     df = pd.DataFrame({col: [] for col in columns})
     df.index.name = "DID"
-    _atomic_write_csv(df, path)
+    _atomic_write_db(df, path)
     # Ensure a persistent pseudonymization salt is created for this DB
     get_or_create_salt_file(path)
     return path
 
 
-def load_db(path: str | Path) -> pd.DataFrame:
+def load_db(path: str | Path, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Load the DB (DID index). With *columns*, only those columns are read, e.g. to
+    skip the DOCUMENT/PSEUDO texts when only IPPs or orders are needed.
+    """
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Database not found: {path}")
 
-    df = pd.read_csv(path, index_col=0)
+    if is_parquet_db(path):
+        _require_parquet()
+        df = pq.read_table(path, columns=columns, use_pandas_metadata=True).to_pandas()
+    elif columns is None:
+        df = pd.read_csv(path, index_col=0)
+    else:
+        header = _read_csv_header(path)
+        missing = [c for c in columns if c not in header[1:]]
+        if missing:
+            raise KeyError(f"Columns not in database {path}: {missing}")
+        usecols = [0] + [header.index(c, 1) for c in columns]
+        df = pd.read_csv(path, index_col=0, usecols=usecols)[list(columns)]
     df.index.name = "DID"
 
     # Normalize IPP to string (prevents 1 vs 1.0 vs "1")
@@ -91,10 +166,44 @@ def load_db(path: str | Path) -> pd.DataFrame:
 
     return df
 
+def read_db_columns(path: str | Path) -> list[str]:
+    """The DB's column names (index excluded), read from the header/schema only."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Database not found: {path}")
+
+    if is_parquet_db(path):
+        _require_parquet()
+        schema = pq.read_schema(path)
+        # Stored index columns are listed by name (a RangeIndex is a dict, not a column)
+        index_cols = {
+            c for c in (schema.pandas_metadata or {}).get("index_columns", [])
+            if isinstance(c, str)
+        }
+        return [n for n in schema.names if n not in index_cols]
+    return _read_csv_header(path)[1:]
+
 def save_db(df: pd.DataFrame, path: str | Path) -> None:
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    _atomic_write_csv(df, path)
+    _atomic_write_db(df, path)
+
+
+@contextmanager
+def _db_lock(db_path: Path):
+    """Hold the '<db>.lock' file lock (no-op when portalocker is not installed)."""
+    if portalocker is None:
+        yield
+        return
+    lock_path = db_path.with_suffix(db_path.suffix + ".lock")
+    with portalocker.Lock(str(lock_path), timeout=10):
+        yield
+
+
+def _insert_and_save(db_path: Path, new_rows: pd.DataFrame) -> None:
+    df = load_db(db_path)
+    df2 = insert_documents_with_order(df, new_rows)
+    save_db(df2, db_path)
 
 
 def append_rows_locked(db_path: str | Path, new_rows: pd.DataFrame) -> None:
@@ -107,17 +216,368 @@ def append_rows_locked(db_path: str | Path, new_rows: pd.DataFrame) -> None:
     # Ensure DB has a persistent pseudonymization salt (created on first write if missing)
     get_or_create_salt_file(db_path)
 
-    if portalocker is None:
-        df = load_db(db_path)
-        df2 = insert_documents_with_order(df, new_rows)
-        save_db(df2, db_path)
+    with _db_lock(db_path):
+        _insert_and_save(db_path, new_rows)
+
+
+def append_records_locked(db_path: str | Path, records: list[dict]) -> None:
+    """
+    Same as append_rows_locked for a list of row dicts, without building a DataFrame
+    when it can be avoided (see DBAppender).
+    """
+    if not records:
         return
+    with DBAppender(db_path) as appender:
+        appender.append(records)
 
-    lock_path = db_path.with_suffix(db_path.suffix + ".lock")
-    with portalocker.Lock(str(lock_path), timeout=10):
-        df = load_db(db_path)
-        df2 = insert_documents_with_order(df, new_rows)
-        save_db(df2, db_path)
+
+class DBAppender:
+    """
+    Appends batches of records to one DB while holding its lock, e.g. for a whole commit.
+
+    If the new rows leave the ORDER of every existing row unchanged, they are written
+    at the end of the CSV. Otherwise, and for DBs without CONSULT_DATE columns yet, the
+    DB is fully reloaded and rewritten as in append_rows_locked. A Parquet DB is
+    rewritten for every batch, but read only once per session (the frame is kept).
+
+    Between batches the CSV stays open in append mode and the IPP/ORDER/CONSULT_DATE_NUM
+    values needed for the ORDER check are kept in memory (read from the DB once), so a
+    batch costs one write instead of a lock, a partial DB read and an open. The file is
+    fsync'ed on close().
+
+    The rows appended in place are also remembered (without DOCUMENT) so that
+    sync_pseudo_only_copy can extend the pseudo-only copy instead of rewriting it.
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.db_path = Path(db_path)
+        self._lock: Optional[ExitStack] = None
+        self._fh = None
+        self._header: Optional[list[str]] = None
+        # IPP -> ([CONSULT_DATE_NUM], [ORDER]) of the rows in the DB, and the next DID
+        self._by_ipp: Optional[dict[str, tuple[list, list]]] = None
+        self._next_did = 1
+        # (size, mtime_ns) of the DB when opened, and the rows appended in place since
+        # (None once the DB has been rewritten)
+        self._start_stat: Optional[tuple[int, int]] = None
+        self._appended: Optional[list[list]] = []
+        # Parquet DB as last written by this appender (read once per session)
+        self._frame: Optional[pd.DataFrame] = None
+
+    def open(self) -> "DBAppender":
+        get_or_create_salt_file(self.db_path)
+        lock = ExitStack()
+        lock.enter_context(_db_lock(self.db_path))
+        self._lock = lock
+        try:
+            self._start_stat = file_stat_key(self.db_path)
+        except OSError:
+            self._start_stat = None
+        self._appended = []
+        self._frame = None
+        return self
+
+    def close(self) -> None:
+        try:
+            self._close_file(sync=True)
+        finally:
+            if self._lock is not None:
+                self._lock.close()
+                self._lock = None
+
+    def __enter__(self) -> "DBAppender":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, records: list[dict]) -> None:
+        if not records:
+            return
+        if self._lock is None:
+            raise RuntimeError("DBAppender used outside of open()/close()")
+        try:
+            if is_parquet_db(self.db_path):
+                self._append_parquet(records)
+            elif not self._try_append_csv(records):
+                # The file is replaced: drop the handle and everything cached from it
+                self._reset()
+                self._appended = None
+                _insert_and_save(self.db_path, pd.DataFrame(records))
+        except Exception:
+            self._reset()
+            self._appended = None
+            raise
+
+    def sync_pseudo_only_copy(self, dst_path: str | Path) -> Path:
+        """
+        Bring the pseudo-only copy *dst_path* (see write_pseudo_only_copy) up to date
+        with the DB, while the DB is still locked (call before close()).
+
+        If the copy matched the DB when this appender was opened and every batch was
+        appended in place, only those rows are appended to it; otherwise it is rewritten.
+        """
+        dst_path = Path(dst_path)
+        if self._fh is not None:
+            self._fh.flush()
+        if self._try_append_pseudo_only(dst_path):
+            _save_pseudo_only_state(self.db_path, dst_path)
+        else:
+            write_pseudo_only_copy(self.db_path, dst_path)
+        return dst_path
+
+    def _try_append_pseudo_only(self, dst_path: Path) -> bool:
+        if is_parquet_db(self.db_path) or self._appended is None or self._start_stat is None:
+            return False
+        try:
+            copy_stat = file_stat_key(dst_path)
+        except OSError:
+            return False
+        if _load_pseudo_only_state(dst_path) != (self._start_stat, copy_stat):
+            return False  # the copy was not in sync with the DB this session started from
+
+        header = self._header or _read_csv_header(self.db_path)
+        if _read_csv_header(dst_path) != [c for c in header if c != "DOCUMENT"]:
+            return False
+        if not self._appended:
+            return True
+
+        with open(dst_path, "rb") as fh:
+            quoted = fh.read(1) == b'"'
+            fh.seek(0, os.SEEK_END)
+            fh.seek(max(0, fh.tell() - 2))
+            tail = fh.read()
+        # Same line endings and quoting as the writer that produced the copy
+        lineterminator = "\r\n" if tail.endswith(b"\r\n") else "\n"
+        with open(dst_path, "a", newline="", encoding="utf-8") as fh:
+            if tail and not tail.endswith((b"\n", b"\r")):
+                fh.write(lineterminator)
+            if quoted:
+                # pyarrow.csv: every non-empty field quoted
+                fh.writelines(
+                    ",".join(map(_quote_csv_field, row)) + lineterminator
+                    for row in self._appended
+                )
+            else:
+                csv.writer(fh, lineterminator=lineterminator).writerows(self._appended)
+        return True
+
+    def _append_parquet(self, records: list[dict]) -> None:
+        """Rewrite the Parquet DB with *records*, from the frame kept since the last batch."""
+        self._appended = None
+        if self._frame is None:
+            self._frame = load_db(self.db_path)
+        frame = insert_documents_with_order(self._frame, pd.DataFrame(records))
+        _atomic_write_parquet(frame, self.db_path)
+        self._frame = frame
+
+    def _reset(self) -> None:
+        self._close_file()
+        self._header = None
+        self._by_ipp = None
+        self._frame = None
+
+    def _close_file(self, sync: bool = False) -> None:
+        if self._fh is None:
+            return
+        try:
+            if sync:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def _load_order_columns(self, header: list[str]) -> bool:
+        existing = pd.read_csv(
+            self.db_path,
+            index_col=0,
+            usecols=[0, header.index("IPP"), header.index("ORDER"), header.index("CONSULT_DATE_NUM")],
+        )
+        if not pd.api.types.is_integer_dtype(existing.index):
+            return False
+
+        by_ipp: dict[str, tuple[list, list]] = {}
+        ipps = existing["IPP"].apply(_normalize_ipp)
+        dates = pd.to_numeric(existing["CONSULT_DATE_NUM"], errors="coerce")
+        orders = pd.to_numeric(existing["ORDER"], errors="coerce")
+        for ipp, date, order in zip(ipps, dates, orders):
+            entry = by_ipp.setdefault(ipp, ([], []))
+            entry[0].append(date)
+            entry[1].append(order)
+
+        self._by_ipp = by_ipp
+        self._next_did = int(existing.index.max()) + 1 if len(existing) else 1
+        return True
+
+    def _try_append_csv(self, records: list[dict]) -> bool:
+        """
+        Append *records* in place if that yields the same DB as insert_documents_with_order.
+        Returns False (file untouched) when a full rewrite is needed.
+        """
+        if self._header is None:
+            self._header = _read_csv_header(self.db_path)
+        header = self._header
+        date_cols = {"CONSULT_DATE_NUM", "CONSULT_DATE"}
+        if not date_cols.issubset(header):
+            return False
+        row_cols = set(header[1:]) - date_cols
+        if any(set(r) != row_cols for r in records):
+            return False  # let insert_documents_with_order report the mismatch
+
+        if self._by_ipp is None and not self._load_order_columns(header):
+            return False
+        by_ipp = self._by_ipp
+
+        new_ipps = [_normalize_ipp(r["IPP"]) for r in records]
+        dates = [extract_consult_dates(r["DOCUMENT"]) for r in records]
+        new_dates = [d[0] for d in dates]
+        new_orders = [r["ORDER"] for r in records]
+
+        for ipp in set(new_ipps):
+            mine = [i for i, x in enumerate(new_ipps) if x == ipp]
+            old_dates, old_orders = by_ipp.get(ipp, ([], []))
+            if len(old_dates) + len(mine) == 1:
+                continue  # sole row for this IPP: ORDER kept as given
+
+            if pd.isna(old_dates).any() or pd.isna(old_orders).any():
+                return False
+
+            date_col = [int(d) for d in old_dates] + [new_dates[i] for i in mine]
+            ordered_dates = sorted(date_col)
+            ranks = [ordered_dates.index(d) + 1 for d in date_col]
+            if ranks[: len(old_dates)] != [int(o) for o in old_orders]:
+                return False  # existing rows would be re-ranked
+            for i, rank in zip(mine, ranks[len(old_dates):]):
+                new_orders[i] = rank
+
+        values = []
+        for i, r in enumerate(records):
+            row = dict(r, ORDER=new_orders[i], CONSULT_DATE_NUM=new_dates[i], CONSULT_DATE=dates[i][1])
+            values.append([self._next_did + i] + [row[c] for c in header[1:]])
+
+        fh = self._fh or self._open_for_append()
+        # Same dialect as DataFrame.to_csv, so appended rows are indistinguishable from a rewrite
+        csv.writer(fh, lineterminator=os.linesep).writerows(values)
+        fh.flush()
+
+        if self._appended is not None:
+            doc_idx = header.index("DOCUMENT") if "DOCUMENT" in header else None
+            self._appended.extend(
+                v[:doc_idx] + v[doc_idx + 1:] if doc_idx is not None else v for v in values
+            )
+
+        self._next_did += len(records)
+        for ipp, date, order in zip(new_ipps, new_dates, new_orders):
+            entry = by_ipp.setdefault(ipp, ([], []))
+            entry[0].append(date)
+            entry[1].append(order)
+        return True
+
+    def _open_for_append(self):
+        with open(self.db_path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            needs_newline = False
+            if fh.tell() > 0:
+                fh.seek(-1, os.SEEK_END)
+                needs_newline = fh.read(1) not in (b"\n", b"\r")
+
+        self._fh = open(self.db_path, "a", newline="", encoding="utf-8")
+        if needs_newline:
+            self._fh.write(os.linesep)
+        return self._fh
+
+def _read_csv_header(path: Path) -> list[str]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        return next(csv.reader(fh), [])
+
+
+def write_pseudo_only_copy(db_path: str | Path, dst_path: str | Path) -> Path:
+    """
+    Create/overwrite *dst_path* with all DB rows but without the DOCUMENT column.
+
+    With pyarrow, DOCUMENT is dropped at parse time (never materialized) and every
+    other column is copied verbatim as text, one record batch at a time. Without it, the CSV is streamed through
+    csv.reader/csv.writer.
+    A Parquet DB is projected column-wise into a Parquet copy.
+    CSV copies record the state used by DBAppender.sync_pseudo_only_copy.
+    """
+    db_path = Path(db_path)
+    dst_path = Path(dst_path)
+
+    if is_parquet_db(db_path):
+        _require_parquet()
+        keep = [c for c in pq.read_schema(db_path).names if c != "DOCUMENT"]
+        table = pq.read_table(db_path, columns=keep)
+        tmp = dst_path.with_suffix(dst_path.suffix + ".tmp")
+        pq.write_table(table, tmp, compression=PARQUET_COMPRESSION)
+        tmp.replace(dst_path)
+        return dst_path
+
+    if pa_csv is not None:
+        keep = [c for c in _read_csv_header(db_path) if c != "DOCUMENT"]
+        reader = pa_csv.open_csv(
+            db_path,
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=keep,
+                column_types={c: pa.string() for c in keep},
+                strings_can_be_null=True,
+            ),
+        )
+        # Batch by batch into a temporary file: Arrow buffers stay bounded and a reader
+        # of the copy never sees it half-written.
+        tmp = dst_path.with_suffix(dst_path.suffix + ".tmp")
+        with reader, pa_csv.CSVWriter(tmp, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        tmp.replace(dst_path)
+        _save_pseudo_only_state(db_path, dst_path)
+        return dst_path
+
+    # Without pyarrow: stream row by row, only one record is held in memory at a time
+    with open(db_path, newline="", encoding="utf-8") as src, \
+            open(dst_path, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst, lineterminator=os.linesep)
+        header = next(reader, [])
+        rows = chain((header,), reader)
+        if "DOCUMENT" in header:
+            doc_idx = header.index("DOCUMENT")
+            rows = (row[:doc_idx] + row[doc_idx + 1:] for row in rows)
+        writer.writerows(rows)
+    _save_pseudo_only_state(db_path, dst_path)
+    return dst_path
+
+
+# A CSV pseudo-only copy is in sync with its DB while both files still have the
+# (size, mtime) recorded here when the copy was last written.
+PSEUDO_ONLY_STATE_SUFFIX = ".state.json"
+
+
+def _quote_csv_field(value) -> str:
+    text = "" if value is None else str(value)
+    return '"' + text.replace('"', '""') + '"' if text else ""
+
+
+def _pseudo_only_state_path(dst_path: Path) -> Path:
+    return dst_path.with_name(f"{dst_path.stem}{PSEUDO_ONLY_STATE_SUFFIX}")
+
+
+def _save_pseudo_only_state(db_path: Path, dst_path: Path) -> None:
+    try:
+        state = {"db": list(file_stat_key(db_path)), "copy": list(file_stat_key(dst_path))}
+        _pseudo_only_state_path(dst_path).write_text(json.dumps(state), encoding="utf-8")
+    except OSError:
+        pass  # without a state the next sync rewrites the copy
+
+
+def _load_pseudo_only_state(dst_path: Path) -> Optional[tuple[tuple[int, int], tuple[int, int]]]:
+    try:
+        state = json.loads(_pseudo_only_state_path(dst_path).read_text(encoding="utf-8"))
+        return tuple(state["db"]), tuple(state["copy"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
 # ---------------------------------------------------------------------------
 # LLM singleton, lazy-loaded on first fallback call
@@ -305,6 +765,18 @@ def extract_consult_date(text: str, return_num: bool = False):
         If True return an int YYYYMMDD; otherwise a string "YYYY/MM/DD"
         (sorted descending components).
     """
+    # ---- 4) Format output ----
+    return _format_date(_consult_date_num_list(text), return_num)
+
+def extract_consult_dates(text: str) -> tuple[int, str]:
+    """
+    Both forms of the consultation date, (CONSULT_DATE_NUM, CONSULT_DATE), from a
+    single extraction (the regex, or the LLM fallback, runs once per document).
+    """
+    num_list = _consult_date_num_list(text)
+    return _format_date(num_list, True), _format_date(num_list, False)
+
+def _consult_date_num_list(text: str) -> list[int]:
     # ---- 1) Rule-based approach (unchanged logic) ----
     raw_date = _extract_consult_date_regex(text)
 
@@ -314,10 +786,12 @@ def extract_consult_date(text: str, return_num: bool = False):
         raw_date = _extract_consult_date_llm(text)  # "DD/MM/YYYY" or raises
 
     # ---- 3) Parse into num_list (shared by both branches) ----
-    num_list = _parse_raw_date(raw_date)
+    return _parse_raw_date(raw_date)
 
-    # ---- 4) Format output ----
-    return _format_date(num_list, return_num)
+def _consult_date_columns(documents: pd.Series) -> tuple[list, list]:
+    """CONSULT_DATE_NUM and CONSULT_DATE values for *documents*."""
+    dates = [extract_consult_dates(d) for d in documents]
+    return [d[0] for d in dates], [d[1] for d in dates]
 
 def insert_documents_with_order(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
     """
@@ -336,15 +810,13 @@ def insert_documents_with_order(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.
 
     if "CONSULT_DATE" not in df.columns:
         df = df.copy()  # Don't modify the original
-        df["CONSULT_DATE_NUM"] = df["DOCUMENT"].apply(extract_consult_date, return_num=True)
-        df["CONSULT_DATE"] = df["DOCUMENT"].apply(extract_consult_date, return_num=False)
+        df["CONSULT_DATE_NUM"], df["CONSULT_DATE"] = _consult_date_columns(df["DOCUMENT"])
 
     # FIXED: Add CONSULT_DATE columns to new_rows BEFORE checking column equality
     # This ensures new_rows always has the same columns as df after the first chunk
     if "CONSULT_DATE" not in new_rows.columns:
         new_rows = new_rows.copy()  # Don't modify the original
-        new_rows["CONSULT_DATE_NUM"] = new_rows["DOCUMENT"].apply(extract_consult_date, return_num=True)
-        new_rows["CONSULT_DATE"] = new_rows["DOCUMENT"].apply(extract_consult_date, return_num=False)
+        new_rows["CONSULT_DATE_NUM"], new_rows["CONSULT_DATE"] = _consult_date_columns(new_rows["DOCUMENT"])
     
     # Now check column equality
     if set(df.columns) == set(new_rows.columns):
@@ -360,20 +832,98 @@ def insert_documents_with_order(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.
     
     # no need to check order if its the only row with that IPP
     ipp_to_check = common_ipp.union(truly_new_ipp)
-    ipp_to_check = [ipp for ipp in ipp_to_check 
-                    if len(concat_db[concat_db["IPP"] == ipp]) > 1]
+    # Row positions per IPP, grouped once instead of one boolean mask per IPP
+    positions = concat_db.groupby("IPP", sort=False).indices
+    ipp_to_check = [ipp for ipp in ipp_to_check
+                    if len(positions.get(ipp, ())) > 1]
 
     # Inspect order
+    dates = concat_db["CONSULT_DATE_NUM"].to_numpy()
+    order_col = concat_db.columns.get_loc("ORDER")
     for ipp in ipp_to_check:
-        mask = concat_db["IPP"] == ipp
-        date_col = concat_db[mask]["CONSULT_DATE_NUM"].to_list()
+        rows = positions[ipp]
+        date_col = dates[rows].tolist()
         ordered_dates = sorted(date_col)
         new_order = [int(ordered_dates.index(row_date))+1 for row_date in date_col]
-        concat_db.loc[mask, "ORDER"] = new_order
+        concat_db.iloc[rows, order_col] = new_order
     
     concat_db.index.name = "DID"
     return concat_db
 
+def document_digest(document: str) -> int:
+    """
+    64-bit fingerprint of a document's text, used for exact duplicate checks.
+
+    Only compared within one IPP's documents, so a fast non-cryptographic hash is
+    enough: xxh3 when xxhash is installed, BLAKE2b otherwise. Digests are only
+    persisted as cache keys (near_duplicates sidecar), where a change of hash function
+    costs cache misses, not wrong results.
+    """
+    data = document.encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def build_duplicate_index(df: pd.DataFrame) -> defaultdict[str, set[int]]:
+    """
+    IPP -> digests of the documents already stored for it, so that checking whether
+    (IPP, DOCUMENT) is in the DB is a set lookup instead of a scan of the DB.
+    """
+    index: defaultdict[str, set[int]] = defaultdict(set)
+    for ipp, document in zip(df["IPP"].astype(str), df["DOCUMENT"]):
+        if isinstance(document, str):
+            index[ipp].add(document_digest(document))
+    return index
+
+
+# Files already committed are recognized by (size, mtime) before being opened: the
+# 'SOURCE_FILE -> [size, mtime_ns]' map is kept next to the DB, not as DB columns, so
+# existing databases keep their schema.
+FILE_INDEX_SUFFIX = "_file_index.json"
+
+
+def file_index_path(db_path: str | Path) -> Path:
+    p = Path(db_path)
+    return p.with_name(f"{p.stem}{FILE_INDEX_SUFFIX}")
+
+
+def file_stat_key(path: str | Path) -> tuple[int, int]:
+    """(size, mtime_ns) of *path*; raises OSError if it cannot be stat'ed."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_file_index(db_path: str | Path, df: pd.DataFrame) -> dict[str, tuple[int, int]]:
+    """
+    SOURCE_FILE -> (size, mtime_ns) of the committed files, restricted to the files
+    still referenced by *df* (rows removed from the DB are forgotten).
+    """
+    path = file_index_path(db_path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            raw = json.load(fh)
+    except (OSError, ValueError):
+        return {}  # unreadable index: every file goes through extraction again
+
+    known = set(df["SOURCE_FILE"].astype(str))
+    return {
+        f: (int(v[0]), int(v[1]))
+        for f, v in raw.items()
+        if f in known and isinstance(v, list) and len(v) == 2
+    }
+
+
+def save_file_index(db_path: str | Path, index: dict[str, tuple[int, int]]) -> None:
+    path = file_index_path(db_path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({f: list(v) for f, v in index.items()}, fh)
+    tmp.replace(path)
+
+
 def extract_IPP_from_path(path):
     file_name = Path(path).name if isinstance(path, str) else path.name
     matches = re.search(r"8[0-9]{9}", file_name)
@@ -381,18 +931,103 @@ def extract_IPP_from_path(path):
         raise ValueError(f"No IPP found in file {path}. Must contain a 10 digit id starting by 8.")
     return int(matches.group(0))
 
+# IPP as written in the INS/NIR line: " 8xxxxxxxxx" or "IPP: 8xxxxxxxxx". The second form
+# always contains the first (the colon is followed by a space) and starts on the same
+# leftmost match, so a single pattern is enough.
+_IPP_DOC_PATTERN = r" 8[0-9]{9}"
+_IPP_DOC_RE = re.compile(_IPP_DOC_PATTERN)
+_IPP_DOC_LEN = 11
+
+# hyperscan scratch space is not thread-safe: one compiled database per thread
+_IPP_HS_LOCAL = threading.local()
+
+
+def _ipp_hyperscan_db():
+    db = getattr(_IPP_HS_LOCAL, "db", None)
+    if db is None:
+        db = hyperscan.Database()
+        db.compile(expressions=[_IPP_DOC_PATTERN.encode("ascii")], ids=[0], flags=[0])
+        _IPP_HS_LOCAL.db = db
+    return db
+
+
+def _find_IPP_in_document(text: str, hs_db=None) -> Optional[int]:
+    if hs_db is None:
+        match = _IPP_DOC_RE.search(text)
+        return int(match.group(0)[1:]) if match else None
+
+    data = text.encode("utf-8")
+    ends: list[int] = []
+
+    def _on_match(_id, _start, end, _flags, _ctx):
+        # Fixed-length pattern: the first reported end is the leftmost match. Stop there.
+        ends.append(end)
+        return True
+
+    try:
+        hs_db.scan(data, match_event_handler=_on_match)
+    except hyperscan.ScanTerminated:
+        pass
+    if not ends:
+        return None
+    return int(data[ends[0] - _IPP_DOC_LEN + 1 : ends[0]])
+
+
+def extract_IPP_batch(texts: list[str]) -> list[Optional[int]]:
+    """
+    extract_IPP_from_document over a batch of documents, None where no IPP is found.
+    Uses one compiled hyperscan database for the whole batch when hyperscan is installed.
+    """
+    hs_db = _ipp_hyperscan_db() if hyperscan is not None else None
+    return [_find_IPP_in_document(text, hs_db) for text in texts]
+
+
 def extract_IPP_from_document(text):
     """
     Retrieves the IPP from the INS/NIR line.
     """
-    matches = re.search(r"( 8[0-9]{9}( |))|(IPP: 8[0-9]{9})", text)
-    if matches is None:
+    ipp = extract_IPP_batch([text])[0]
+    if ipp is None:
         raise ValueError(f"No IPP found in document.")
-    
-    # Extract just the 10-digit IPP number (8 followed by 9 digits)
-    matched_text = matches.group(0)
-    ipp_match = re.search(r"8[0-9]{9}", matched_text)
-    return int(ipp_match.group(0))
+    return ipp
+
+
+def extract_document(
+    pdf_path: str | Path, cache_path: str | Path | None = None
+) -> tuple[str, str, str, Optional[str]]:
+    """
+    Picklable executor entry point: extract one PDF and resolve its IPP in the worker.
+
+    Returns (pdf_path, text, ipp, cache_key). The IPP is read from the document,
+    falling back to the file name; raises ValueError when the text is empty or no IPP
+    can be found. With *cache_path* (see extract_cache.cache_path), the text is looked
+    up by file hash before extracting; cache errors only cost the lookup. Nothing is
+    stored here: *cache_key* is the hash of a freshly extracted file, for the caller to
+    cache the text once the document is committed (None otherwise).
+    """
+    key = text = None
+    if cache_path is not None:
+        key = file_sha256(pdf_path)
+        if os.path.exists(cache_path):  # not created by a lookup
+            try:
+                text = cache_for(cache_path).get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Extraction cache unavailable ({cache_path}): {e}")
+        if text is not None:
+            key = None  # already cached
+
+    if text is None:
+        from src.database.text_extraction import extract_text
+
+        text = extract_text(pdf_path)
+        if not text.strip():
+            raise ValueError("Empty extracted text")
+
+    hs_db = _ipp_hyperscan_db() if hyperscan is not None else None
+    ipp = _find_IPP_in_document(text, hs_db)
+    if ipp is None:
+        ipp = extract_IPP_from_path(pdf_path)
+    return str(pdf_path), text, str(int(ipp)), key
 
 def ensure_correct_IPP(df):
     """
@@ -63,6 +63,11 @@ BRIGHT_PRACTITIONERS: set[str] = {
 # Pre-compute lowercased whitelist for case-insensitive matching
 _BRIGHT_PRACTITIONERS_LOWER: set[str] = {n.lower() for n in BRIGHT_PRACTITIONERS}
 
+# Model input chunking (characters) and number of chunks per nlp.pipe() batch
+MAX_MODEL_CHARS = 1000
+OVERLAP_CHARS = 350
+PIPE_BATCH_SIZE = 16
+
 
 class TextPseudonymizer:
     """
@@ -143,7 +148,61 @@ class TextPseudonymizer:
           Optional override map. Template receives {label} and {token}.
           Example: {"PERSON": "[PERSON_{token}]"}
         """
-        spans = self.detect_spans(text)
+        return self._pseudonymize_spans(
+            text,
+            self.detect_spans(text),
+            ipp=ipp,
+            consistent_across_ipp=consistent_across_ipp,
+            label_to_template=label_to_template,
+            keep_practitioner_names=keep_practitioner_names,
+        )
+
+    def pseudonymize_batch(
+        self,
+        texts: List[str],
+        *,
+        ipps: Optional[List[Optional[str]]] = None,
+        consistent_across_ipp: bool = False,
+        label_to_template: Optional[Dict[str, str]] = None,
+        keep_practitioner_names: bool = True,
+        batch_size: int = PIPE_BATCH_SIZE,
+    ) -> List[str]:
+        """
+        pseudonymize() over several documents, running the model on all their chunks
+        through a single nlp.pipe() call instead of one model call per chunk.
+
+        ipps: one IPP per text (same meaning as in pseudonymize), or None.
+        """
+        if ipps is None:
+            ipps = [None] * len(texts)
+        if len(ipps) != len(texts):
+            raise ValueError(f"Got {len(texts)} texts but {len(ipps)} ipps.")
+
+        return [
+            self._pseudonymize_spans(
+                text,
+                spans,
+                ipp=ipp,
+                consistent_across_ipp=consistent_across_ipp,
+                label_to_template=label_to_template,
+                keep_practitioner_names=keep_practitioner_names,
+            )
+            for text, ipp, spans in zip(
+                texts, ipps, self.detect_spans_batch(texts, batch_size=batch_size)
+            )
+        ]
+
+    def _pseudonymize_spans(
+        self,
+        text: str,
+        spans: List[DetectedSpan],
+        *,
+        ipp: Optional[str],
+        consistent_across_ipp: bool,
+        label_to_template: Optional[Dict[str, str]],
+        keep_practitioner_names: bool,
+    ) -> str:
+        """Rewrite *text* given the spans detected in it (see pseudonymize)."""
         if not spans:
             return text
 
@@ -216,52 +275,59 @@ class TextPseudonymizer:
           - Recombine spans by offsetting start/end with the chunk start.
           - Dedupe overlaps globally (keeps the longest span in each overlap region).
         """
-        MAX_MODEL_CHARS = 1000
-        OVERLAP_CHARS = 350
+        return self.detect_spans_batch([text])[0]
 
-        all_spans: List[DetectedSpan] = []
+    def detect_spans_batch(
+        self, texts: List[str], *, batch_size: int = PIPE_BATCH_SIZE
+    ) -> List[List[DetectedSpan]]:
+        """
+        detect_spans() for several texts: the chunks of every text go through one
+        nlp.pipe() call (batches of *batch_size* chunks) and the spans are mapped
+        back to their text.
+        """
+        jobs: List[Tuple[int, int]] = []  # (text index, chunk offset), aligned with chunks
+        chunks: List[str] = []
+        for i, text in enumerate(texts):
+            for chunk, offset in self._iter_text_chunks(
+                text,
+                max_chars=MAX_MODEL_CHARS,
+                overlap=OVERLAP_CHARS,
+            ):
+                if not chunk.strip():
+                    continue
+                jobs.append((i, offset))
+                chunks.append(chunk)
 
-        for chunk, offset in self._iter_text_chunks(
-            text,
-            max_chars=MAX_MODEL_CHARS,
-            overlap=OVERLAP_CHARS,
-        ):
-            if not chunk.strip():
-                continue
+        all_spans: List[List[DetectedSpan]] = [[] for _ in texts]
+        if not chunks:
+            return all_spans
 
-            doc = self.nlp(chunk)
+        for (i, offset), doc in zip(jobs, self.nlp.pipe(chunks, batch_size=batch_size)):
+            text = texts[i]
             for ent in getattr(doc, "ents", []):
                 start = int(ent.start_char) + offset
                 end = int(ent.end_char) + offset
                 if start < 0 or end <= start or end > len(text):
                     continue
-                
+
                 if str(ent.label_) == "DATE_NAISSANCE":
                     pseudo_value = str(ent._.date).split("-")[0] + "-??-??"
-                    span = DetectedSpan(
-                        start=start,
-                        end=end,
-                        label=str(ent.label_),
-                        text=text[start:end],
-                        pseudo_value=pseudo_value,
-                    )
                 else:
-                    span = DetectedSpan(
+                    pseudo_value = ""
+                all_spans[i].append(
+                    DetectedSpan(
                         start=start,
                         end=end,
                         label=str(ent.label_),
                         text=text[start:end],
-                        pseudo_value="",
+                        pseudo_value=pseudo_value,
                     )
+                )
 
-                all_spans.append(span)
-
-        if not all_spans:
-            return []
-
-        # Sort by (start asc, end desc) for predictable behavior, then drop overlaps.
-        all_spans.sort(key=lambda s: (s.start, -(s.end - s.start)))
-        all_spans = self._dedupe_overlaps(all_spans)
+        for spans in all_spans:
+            # Sort by (start asc, end desc) for predictable behavior, then drop overlaps.
+            spans.sort(key=lambda s: (s.start, -(s.end - s.start)))
+            spans[:] = self._dedupe_overlaps(spans)
         return all_spans
 
     # ---------------------------
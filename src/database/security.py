@@ -104,7 +104,6 @@ def get_or_create_salt_file(db_path: str | Path) -> str:
     return salt
 
 import hashlib
-from scipy.stats import hypergeom
 
 class OptimizedOPE:
     def __init__(self, key, out_range_size=2**32):
@@ -133,6 +132,8 @@ class OptimizedOPE:
         # "ppf" is the Percent Point Function (Inverse CDF).
         # It maps our uniform random number to the Hypergeometric distribution.
         # Params: (Total Outputs, Total Inputs, Size of Lower Output Chunk)
+        from scipy.stats import hypergeom  # imported on first use, not with the salt helpers
+
         x = hypergeom.ppf(uniform_random, out_size, in_size, out_split_point)
         
         return int(x)
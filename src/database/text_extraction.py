@@ -1,5 +1,6 @@
 from __future__ import annotations
 import re
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -77,7 +78,9 @@ def normalize_extracted_text(text: str) -> str:
 # Scanned-PDF detection helpers
 # ---------------------------------------------------------------------------
 
-def _is_scanned_pdf(pdf_path: Path, min_chars_per_page: int = 30) -> bool:
+def _is_scanned_pdf(
+    pdf_path: Path, min_chars_per_page: int = 30, data: Optional[bytes] = None
+) -> bool:
     """
     Heuristic to decide whether a PDF is scanned (image-only).
 
@@ -91,12 +94,19 @@ def _is_scanned_pdf(pdf_path: Path, min_chars_per_page: int = 30) -> bool:
 
     This two-pronged check avoids false positives on blank/intentionally
     empty pages and on PDFs that mix text pages with full-page figures.
+
+    *data*, when given, is the PDF's content (already read by the caller), so the
+    file is not opened again.
     """
     import fitz  # PyMuPDF
 
-    doc = fitz.open(str(pdf_path))
+    if data is not None:
+        doc = fitz.open(stream=data, filetype="pdf")
+    else:
+        doc = fitz.open(str(pdf_path))
     n_pages = len(doc)
     if n_pages == 0:
+        doc.close()
         return False
 
     scanned_pages = 0
@@ -271,10 +281,14 @@ class TextExtractor:
         if not p.exists():
             raise FileNotFoundError(str(p))
 
+        # The file is read once: the scan check and EDS-PDF both parse these bytes
+        data = p.read_bytes()
+
         # ---- Step 0: detect scanned vs true PDF ----
-        scanned = _is_scanned_pdf(p)
+        scanned = _is_scanned_pdf(p, data=data)
 
         if scanned:
+            del data  # OCR renders pages from the file itself
             print(f"[PIPELINE] Scanned PDF detected → routing to OCR pipeline")
             return ocr_pdf(p)
 
@@ -283,7 +297,7 @@ class TextExtractor:
 
         # 1) EDS-PDF (best first)
         try:
-            return self._pdf_to_text_edspdf(p)
+            return self._pdf_to_text_edspdf(p, data)
         except Exception as e:
             print(f"[ERROR EDS-PDF] {e}")
             print("[FAILED] EDS-PDF failed, attempting PyMuPDF...")
@@ -298,8 +312,9 @@ class TextExtractor:
         # 3) pypdf fallback
         return self._pdf_to_text_pypdf(p)
 
-    def _pdf_to_text_edspdf(self, p: Path) -> str:
-        pdf = Path(p).read_bytes()
+    def _pdf_to_text_edspdf(self, p: Path, pdf: Optional[bytes] = None) -> str:
+        if pdf is None:
+            pdf = Path(p).read_bytes()
         doc = self.pipeline(pdf)
         body = doc.aggregated_texts["body"]
         text = body.text
@@ -339,6 +354,37 @@ class TextExtractor:
         return normalize_extracted_text(text)
 
 
+# Per-worker extractor cache (one TextExtractor per process/thread of an executor)
+_WORKER_STATE = threading.local()
+
+
+def init_worker() -> None:
+    """
+    Executor initializer: build this worker's TextExtractor before its first file.
+
+    Failures are left for extract_text to raise per file, so that a broken pipeline
+    reports extraction errors instead of breaking the whole pool.
+    """
+    try:
+        _WORKER_STATE.extractor = TextExtractor()
+    except Exception:
+        pass
+
+
+def extract_text(pdf_path: str | Path) -> str:
+    """
+    Picklable executor entry point: extract text from one PDF.
+
+    Each worker builds its own TextExtractor on first use and reuses it for
+    the following files, so the EDS-PDF pipeline is only constructed once per worker.
+    """
+    extractor = getattr(_WORKER_STATE, "extractor", None)
+    if extractor is None:
+        extractor = TextExtractor()
+        _WORKER_STATE.extractor = extractor
+    return extractor.pdf_to_text(pdf_path)
+
+
 if __name__ == "__main__":
     import sys
 
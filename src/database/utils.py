@@ -1,10 +1,18 @@
 import importlib, logging, os, sys
 import pkgutil
 from pathlib import Path
-from huggingface_hub import snapshot_download
 
 logger = logging.getLogger(__name__)
 
+# Written into hf_cache once snapshot_download has returned: an 'artifacts' folder alone
+# may be left half-filled by an interrupted download.
+COMPLETE_MARKER = ".complete"
+# Download metadata kept by huggingface_hub in a local_dir (present while resumable)
+HF_LOCAL_METADATA = Path(".cache") / "huggingface"
+
+# Packages already imported recursively by prepare_eds_registry (the walk is done once per process)
+_REGISTERED_ROOTS: set[str] = set()
+
 def resolve_eds_model_path(eds_path: str | None) -> Path:
     """
     Resolve an EDS-PSEUDO model 'artifacts' path.
@@ -28,15 +36,26 @@ def resolve_eds_model_path(eds_path: str | None) -> Path:
     base_dir = Path(__file__).resolve().parent
     cache_dir = base_dir / "hf_cache"
     artifacts = cache_dir / "artifacts"
-    if artifacts.exists() and artifacts.is_dir():
+    if (cache_dir / COMPLETE_MARKER).exists() or (
+        artifacts.is_dir() and not (cache_dir / HF_LOCAL_METADATA).exists()
+    ):
+        # Finished download, or a cache copied in by hand: no network round-trip
         return artifacts
 
     # 3) Download model (same approach as test_eds.py)
+    return _download_eds_model(cache_dir)
+
+def _download_eds_model(cache_dir: Path) -> Path:
+    """
+    Download (or resume downloading) the eds-pseudo snapshot into *cache_dir* and mark
+    it complete. Files already fully downloaded are not fetched again.
+    """
+    from huggingface_hub import snapshot_download  # only needed on a cold cache
+
     cache_dir.mkdir(parents=True, exist_ok=True)
     snapshot_download(
         repo_id="AP-HP/eds-pseudo-public",
         local_dir=str(cache_dir),
-        local_dir_use_symlinks=False,
         ignore_patterns=["*.git*"],
     )
     artifacts = cache_dir / "artifacts"
@@ -45,6 +64,7 @@ def resolve_eds_model_path(eds_path: str | None) -> Path:
             "Downloaded eds-pseudo cache, but could not find 'artifacts' folder at "
             f"{artifacts}. Check the Hugging Face snapshot structure."
         )
+    (cache_dir / COMPLETE_MARKER).touch()
     return artifacts
 
 def _import_recursive(package_name: str) -> None:
@@ -56,6 +76,8 @@ def _import_recursive(package_name: str) -> None:
 
     if hasattr(package, "__path__"):
         for _, name, _ in pkgutil.walk_packages(package.__path__, package_name + "."):
+            if name in sys.modules:
+                continue
             try:
                 importlib.import_module(name)
             except Exception as e:
@@ -68,4 +90,7 @@ def prepare_eds_registry(cache_dir: Path) -> None:
     abs_cache = str(cache_dir.resolve())
     if abs_cache not in sys.path:
         sys.path.insert(0, abs_cache)
-    _import_recursive("eds_pseudo")
\ No newline at end of file
+    if "eds_pseudo" in _REGISTERED_ROOTS:
+        return
+    _import_recursive("eds_pseudo")
+    _REGISTERED_ROOTS.add("eds_pseudo")
\ No newline at end of file
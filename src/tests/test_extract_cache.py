@@ -0,0 +1,85 @@
+"""Tests for src/database/extract_cache.py, extracted-text cache keyed by file hash."""
+
+import hashlib
+
+import pytest
+
+from src.database.extract_cache import ExtractCache, cache_path, file_sha256
+
+
+class TestExtractCache:
+    def test_file_sha256(self, tmp_path):
+        f = tmp_path / "a.pdf"
+        f.write_bytes(b"%PDF-1.4 data")
+        assert file_sha256(f) == hashlib.sha256(b"%PDF-1.4 data").hexdigest()
+
+        empty = tmp_path / "empty.pdf"
+        empty.write_bytes(b"")
+        assert file_sha256(empty) == hashlib.sha256(b"").hexdigest()
+
+    def test_roundtrip(self, tmp_path):
+        path = cache_path(tmp_path / "db.csv")
+        assert path.name == "db_extract_cache.sqlite"
+
+        cache = ExtractCache(path)
+        assert cache.get("k") is None
+        cache.put("k", "texte extrait")
+        cache.close()
+
+        assert ExtractCache(path).get("k") == "texte extrait"
+
+    def test_extract_document_uses_cache(self, tmp_path, monkeypatch):
+        from src.database import text_extraction
+        from src.database.ops import extract_document
+
+        calls = []
+
+        def fake_extract(p):
+            calls.append(p)
+            return "IPP: 8123456789 compte-rendu"
+
+        monkeypatch.setattr(text_extraction, "extract_text", fake_extract)
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        copy = tmp_path / "copy.pdf"
+        copy.write_bytes(b"%PDF-1.4")
+        cache = cache_path(tmp_path / "db.csv")
+
+        first = extract_document(pdf, cache)
+        # Nothing is stored by the extraction itself: the caller caches committed texts
+        assert first[3] == file_sha256(pdf)
+        assert not cache.exists()
+        ExtractCache(cache).put(first[3], first[1])
+
+        # Same bytes under another name: served from the cache
+        second = extract_document(copy, cache)
+
+        assert len(calls) == 1
+        assert first[1:3] == second[1:3] == ("IPP: 8123456789 compte-rendu", "8123456789")
+        assert second[0] == str(copy)
+        assert second[3] is None
+
+    def test_purge(self, tmp_path):
+        from src.database.extract_cache import cache_for, purge_cache
+
+        db = tmp_path / "db.csv"
+        assert purge_cache(db) is False
+
+        cache_for(cache_path(db)).put("k", "texte extrait")
+        assert purge_cache(db) is True
+        assert list(tmp_path.iterdir()) == []
+        # An open per-thread connection does not keep serving the deleted texts
+        assert cache_for(cache_path(db)).get("k") is None
+
+    def test_empty_text_not_cached(self, tmp_path, monkeypatch):
+        from src.database import text_extraction
+        from src.database.ops import extract_document
+
+        monkeypatch.setattr(text_extraction, "extract_text", lambda p: " ")
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        cache = cache_path(tmp_path / "db.csv")
+
+        with pytest.raises(ValueError):
+            extract_document(pdf, cache)
+        assert ExtractCache(cache).get(file_sha256(pdf)) is None
@@ -0,0 +1,94 @@
+"""Tests for src/database/near_duplicates.py, MinHash near-duplicate detection."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.ops import document_digest
+from src.database.near_duplicates import (
+    NUM_PERM,
+    NearDuplicateIndex,
+    estimate_similarity,
+    minhash_signature,
+    sidecar_path,
+)
+
+REPORT = (
+    "Compte-rendu de consultation du 01/02/2024. Patient suivi pour un glioblastome "
+    "temporal droit. IRM de controle stable, pas de prise de contraste nouvelle. "
+    "Poursuite du temozolomide a la meme dose. Prochain controle dans trois mois."
+)
+OTHER = (
+    "Compte-rendu operatoire. Exerese macroscopiquement complete d'une lesion frontale "
+    "gauche. Suites simples, sortie prevue a J5 avec corticoides en decroissance."
+)
+
+
+def _sim(a: str, b: str) -> float:
+    return float(estimate_similarity(minhash_signature(a), minhash_signature(b)[None])[0])
+
+
+class TestSignature:
+    def test_shape_and_determinism(self):
+        sig = minhash_signature(REPORT)
+        assert sig.shape == (NUM_PERM,)
+        assert sig.dtype == np.uint32
+        assert np.array_equal(sig, minhash_signature(REPORT))
+
+    def test_similarity(self):
+        assert _sim(REPORT, REPORT) == 1.0
+        # OCR / punctuation / case jitter does not change the word shingles
+        assert _sim(REPORT, REPORT.upper().replace(".", " .")) == 1.0
+        assert _sim(REPORT, OTHER) < 0.2
+
+    def test_empty_text(self):
+        assert minhash_signature("").shape == (NUM_PERM,)
+
+    def test_blocks_do_not_change_signature(self, monkeypatch):
+        from src.database import near_duplicates
+
+        text = " ".join(f"mot{i % 97} {i}" for i in range(500))
+        expected = minhash_signature(text)
+        monkeypatch.setattr(near_duplicates, "_HASH_BLOCK", 7)
+        assert np.array_equal(minhash_signature(text), expected)
+
+
+class TestNearDuplicateIndex:
+    @pytest.fixture
+    def df(self):
+        return pd.DataFrame(
+            {"IPP": ["8000000001", "8000000002"], "DOCUMENT": [REPORT, OTHER]},
+            index=pd.Index([1, 2], name="DID"),
+        )
+
+    def test_find_is_scoped_by_ipp(self, tmp_path, df):
+        index = NearDuplicateIndex.for_db(tmp_path / "db.csv", df)
+        sig = minhash_signature(REPORT + " ")
+
+        assert index.find("8000000001", sig) == 1.0
+        assert index.find("8000000002", sig) is None
+        assert index.find("8000000003", sig) is None
+
+    def test_sidecar_cache(self, tmp_path, df):
+        db = tmp_path / "db.csv"
+        NearDuplicateIndex.for_db(db, df)
+        assert sidecar_path(db).exists()
+
+        # Cached signatures are reused by document digest, removed rows are dropped
+        df2 = df.iloc[:1]
+        index = NearDuplicateIndex.for_db(db, df2)
+        assert len(index) == 1
+        with np.load(sidecar_path(db)) as data:
+            assert data["digests"].tolist() == [document_digest(REPORT)]
+
+    def test_reused_did_gets_its_own_signature(self, tmp_path, df):
+        db = tmp_path / "db.csv"
+        NearDuplicateIndex.for_db(db, df)
+
+        # Last row deleted, then a different document appended under the same DID
+        df2 = df.copy()
+        df2.loc[2, "DOCUMENT"] = REPORT.replace("temporal droit", "frontal gauche")
+        index = NearDuplicateIndex.for_db(db, df2)
+
+        assert index.find("8000000002", minhash_signature(OTHER)) is None
+        assert index.find("8000000002", minhash_signature(df2.loc[2, "DOCUMENT"])) == 1.0
@@ -21,3 +21,420 @@ class TestDatabaseOps:
     @pytest.mark.skip(reason="Phase 0 placeholder, implement in next iteration")
     def test_extract_consult_date_regex(self):
         pass
+
+
+class TestPseudoOnlyCopy:
+    """write_pseudo_only_copy drops DOCUMENT and keeps every other column."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        from src.database.ops import save_db
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "IPP": ["8000000001", "8000000002"],
+                "SOURCE_FILE": ["/a.pdf", "/b.pdf"],
+                "DOCUMENT": ["raw, text\nwith newline", 'say "hi"'],
+                "PSEUDO": ["[NOM_X] text", "pseudo"],
+                "ORDER": [1, 1],
+            },
+            index=pd.Index([1, 2], name="DID"),
+        )
+        path = tmp_path / "db.csv"
+        save_db(df, path)
+        return path
+
+    @pytest.mark.parametrize("use_pyarrow", [True, False])
+    def test_drops_document(self, db_path, monkeypatch, use_pyarrow):
+        from src.database import ops
+
+        if not use_pyarrow:
+            monkeypatch.setattr(ops, "pa_csv", None)
+        elif ops.pa_csv is None:
+            pytest.skip("pyarrow not installed")
+
+        dst = db_path.with_name("db_pseudo_only.csv")
+        ops.write_pseudo_only_copy(db_path, dst)
+
+        out = ops.load_db(dst)
+        assert "DOCUMENT" not in out.columns
+        assert list(out.columns) == ["IPP", "SOURCE_FILE", "PSEUDO", "ORDER"]
+        assert list(out.index) == [1, 2]
+        assert list(out["IPP"]) == ["8000000001", "8000000002"]
+        assert list(out["PSEUDO"]) == ["[NOM_X] text", "pseudo"]
+
+
+class TestExtractIPP:
+    """IPP detection from document text, with and without hyperscan."""
+
+    DOCS = [
+        "INS/NIR : 1 89 05 75 123 456 78 8000000001 né le 18/05/1989",
+        "Patient IPP: 8123456789\nCompte-rendu",
+        "IPP:8123456789 (no space, not an INS line)",
+        "first 8111111111 then IPP: 8222222222",
+        "",
+    ]
+    EXPECTED = [8000000001, 8123456789, None, 8111111111, None]
+
+    @pytest.mark.parametrize("use_hyperscan", [True, False])
+    def test_batch(self, monkeypatch, use_hyperscan):
+        from src.database import ops
+
+        if not use_hyperscan:
+            monkeypatch.setattr(ops, "hyperscan", None)
+        elif ops.hyperscan is None:
+            pytest.skip("hyperscan not installed")
+
+        assert ops.extract_IPP_batch(self.DOCS) == self.EXPECTED
+
+    def test_single_document_raises_when_missing(self):
+        from src.database.ops import extract_IPP_from_document
+
+        assert extract_IPP_from_document(self.DOCS[1]) == 8123456789
+        with pytest.raises(ValueError):
+            extract_IPP_from_document(self.DOCS[2])
+
+    def test_extract_document_falls_back_to_file_name(self, monkeypatch):
+        from src.database import text_extraction
+        from src.database.ops import extract_document
+
+        texts = {"a.pdf": self.DOCS[1], "x_8000000042.pdf": "no id here", "empty.pdf": "  "}
+        monkeypatch.setattr(text_extraction, "extract_text", lambda p: texts[str(p)])
+
+        assert extract_document("a.pdf") == ("a.pdf", self.DOCS[1], "8123456789", None)
+        assert extract_document("x_8000000042.pdf")[2] == "8000000042"
+        with pytest.raises(ValueError):
+            extract_document("empty.pdf")
+
+
+class TestPseudoOnlySync:
+    """DBAppender.sync_pseudo_only_copy appends to the copy when it is in sync."""
+
+    @staticmethod
+    def _record(ipp, day, name):
+        return {
+            "IPP": ipp,
+            "SOURCE_FILE": f"/docs/{name}.pdf",
+            "DOCUMENT": f"Consultation du {day:02d}/01/2021, texte",
+            "PSEUDO": f"pseudo, {name}",
+            "ORDER": 1,
+        }
+
+    def _assert_matches_full_copy(self, db, dst):
+        from src.database.ops import write_pseudo_only_copy
+
+        full = write_pseudo_only_copy(db, dst.with_name("full.csv"))
+        assert dst.read_bytes() == full.read_bytes()
+
+    @pytest.mark.parametrize("use_pyarrow", [True, False])
+    def test_incremental_then_rewrite(self, tmp_path, monkeypatch, use_pyarrow):
+        from src.database import ops
+        from src.database.ops import DBAppender, append_records_locked, init_db
+
+        if not use_pyarrow:
+            monkeypatch.setattr(ops, "pa_csv", None)
+        elif ops.pa_csv is None:
+            pytest.skip("pyarrow not installed")
+
+        db = init_db(tmp_path / "db.csv")
+        dst = tmp_path / "db_pseudo_only.csv"
+        with DBAppender(db) as appender:
+            appender.append([self._record("8000000001", 1, "a")])
+            appender.sync_pseudo_only_copy(dst)
+        before = dst.read_bytes()
+
+        # Later dates only: appended in place, the copy is extended
+        with monkeypatch.context() as m:
+            m.setattr(ops, "write_pseudo_only_copy", None)  # no rewrite allowed
+            with DBAppender(db) as appender:
+                appender.append([self._record("8000000001", 5, "b")])
+                appender.append([self._record("8000000002", 3, "c")])
+                appender.sync_pseudo_only_copy(dst)
+        assert dst.read_bytes().startswith(before)
+        self._assert_matches_full_copy(db, dst)
+
+        # DB changed without syncing the copy: the next sync rewrites it
+        append_records_locked(db, [self._record("8000000003", 2, "d")])
+        with DBAppender(db) as appender:
+            appender.append([self._record("8000000003", 9, "e")])
+            appender.sync_pseudo_only_copy(dst)
+        self._assert_matches_full_copy(db, dst)
+
+    def test_rerank_rewrites_copy(self, tmp_path):
+        from src.database.ops import DBAppender, init_db
+
+        db = init_db(tmp_path / "db.csv")
+        dst = tmp_path / "db_pseudo_only.csv"
+        with DBAppender(db) as appender:
+            appender.append([self._record("8000000001", 5, "a")])
+            appender.sync_pseudo_only_copy(dst)
+        with DBAppender(db) as appender:
+            appender.append([self._record("8000000001", 1, "b")])  # re-ranks "a"
+            appender.sync_pseudo_only_copy(dst)
+        self._assert_matches_full_copy(db, dst)
+
+
+class TestParquetDB:
+    """A '.parquet' DB path goes through the same API as CSV."""
+
+    @pytest.fixture(autouse=True)
+    def _need_pyarrow(self):
+        from src.database import ops
+
+        if ops.pq is None:
+            pytest.skip("pyarrow not installed")
+
+    def test_init_append_roundtrip(self, tmp_path):
+        import pandas as pd
+        from src.database.ops import DEFAULT_COLUMNS, append_rows_locked, init_db, load_db
+
+        path = init_db(tmp_path / "db.parquet")
+        assert list(load_db(path).columns) == DEFAULT_COLUMNS
+
+        rows = pd.DataFrame(
+            {
+                "IPP": ["8000000001", "8000000001"],
+                "SOURCE_FILE": ["/a.pdf", "/b.pdf"],
+                "DOCUMENT": ["Consultation du 12/03/2021", "Consultation du 01/01/2020"],
+                "PSEUDO": ["a", "b"],
+                "ORDER": [1, 1],
+            }
+        )
+        append_rows_locked(path, rows)
+
+        df = load_db(path)
+        assert list(df.index) == [1, 2]
+        assert list(df["IPP"]) == ["8000000001", "8000000001"]
+        assert list(df["ORDER"]) == [2, 1]
+        assert df["DOCUMENT"].iloc[0] == "Consultation du 12/03/2021"
+
+    def test_appender_session_matches_per_batch_rewrite(self, tmp_path, monkeypatch):
+        import pandas as pd
+        from src.database import ops
+
+        def record(ipp, day, name):
+            return {
+                "IPP": ipp,
+                "SOURCE_FILE": f"/docs/{name}.pdf",
+                "DOCUMENT": f"Consultation du {day:02d}/01/2021",
+                "PSEUDO": "p",
+                "ORDER": 1,
+            }
+
+        batches = [
+            [record("8000000001", 5, "a")],
+            [record("8000000001", 2, "b"), record("8000000002", 1, "c")],
+            [record("8000000001", 9, "d")],
+        ]
+        full = ops.init_db(tmp_path / "full.parquet")
+        for batch in batches:
+            ops.append_rows_locked(full, pd.DataFrame(batch))
+
+        session = ops.init_db(tmp_path / "session.parquet")
+        loads = []
+        load_db = ops.load_db
+        monkeypatch.setattr(ops, "load_db", lambda *a, **k: loads.append(a) or load_db(*a, **k))
+        with ops.DBAppender(session) as appender:
+            for batch in batches:
+                appender.append(batch)
+
+        assert len(loads) == 1
+        pd.testing.assert_frame_equal(load_db(session), load_db(full))
+
+    def test_pseudo_only_copy(self, tmp_path):
+        import pandas as pd
+        from src.database.ops import load_db, save_db, write_pseudo_only_copy
+
+        df = pd.DataFrame(
+            {"IPP": ["8000000001"], "DOCUMENT": ["raw"], "PSEUDO": ["p"], "ORDER": [1]},
+            index=pd.Index([1], name="DID"),
+        )
+        src = tmp_path / "db.parquet"
+        save_db(df, src)
+
+        dst = write_pseudo_only_copy(src, tmp_path / "db_pseudo_only.parquet")
+        out = load_db(dst)
+        assert list(out.columns) == ["IPP", "PSEUDO", "ORDER"]
+        assert list(out.index) == [1]
+
+
+class TestLoadColumns:
+    """load_db(columns=...) reads only the requested columns, with the DID index."""
+
+    @pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+    def test_subset(self, tmp_path, suffix):
+        import pandas as pd
+        from src.database import ops
+        from src.database.ops import DEFAULT_COLUMNS, load_db, read_db_columns, save_db
+
+        if suffix == ".parquet" and ops.pq is None:
+            pytest.skip("pyarrow not installed")
+        df = pd.DataFrame(
+            {
+                "IPP": [8000000001, 8000000002],
+                "SOURCE_FILE": ["/a.pdf", "/b.pdf"],
+                "DOCUMENT": ["raw a", "raw b"],
+                "PSEUDO": ["p a", "p b"],
+                "ORDER": [1, 1],
+            },
+            index=pd.Index([3, 7], name="DID"),
+        )
+        path = tmp_path / f"db{suffix}"
+        save_db(df, path)
+
+        assert read_db_columns(path) == DEFAULT_COLUMNS
+        out = load_db(path, columns=["DOCUMENT", "IPP"])
+        assert list(out.columns) == ["DOCUMENT", "IPP"]
+        assert out.index.name == "DID"
+        assert list(out.index) == [3, 7]
+        assert list(out["IPP"]) == ["8000000001", "8000000002"]
+
+    def test_unknown_column(self, tmp_path):
+        from src.database.ops import init_db, load_db
+
+        path = init_db(tmp_path / "db.csv")
+        with pytest.raises(KeyError):
+            load_db(path, columns=["PID"])
+
+
+class TestAppendRecords:
+    """append_records_locked writes the same file as append_rows_locked."""
+
+    @staticmethod
+    def _record(ipp, day, name):
+        return {
+            "IPP": ipp,
+            "SOURCE_FILE": f"/docs/{name}.pdf",
+            "DOCUMENT": f'Consultation du {day:02d}/01/2021\n"quoted", text',
+            "PSEUDO": "a, b",
+            "ORDER": 1,
+        }
+
+    @pytest.mark.parametrize(
+        "batches",
+        [
+            # later dates only: appended in place
+            [[("8000000001", 1, "a")], [("8000000001", 2, "b")], [("8000000002", 3, "c")]],
+            # an earlier date re-ranks existing rows: full rewrite
+            [[("8000000001", 5, "a"), ("8000000002", 1, "b")], [("8000000001", 2, "c")]],
+        ],
+    )
+    def test_matches_full_rewrite(self, tmp_path, batches):
+        import pandas as pd
+        from src.database.ops import append_records_locked, append_rows_locked, init_db
+
+        full = init_db(tmp_path / "full.csv")
+        fast = init_db(tmp_path / "fast.csv")
+        for batch in batches:
+            records = [self._record(*spec) for spec in batch]
+            append_rows_locked(full, pd.DataFrame(records))
+            append_records_locked(fast, records)
+            assert fast.read_bytes() == full.read_bytes()
+
+    def test_date_extracted_once_per_record(self, tmp_path, monkeypatch):
+        import pandas as pd
+        from src.database import ops
+
+        calls = []
+        regex = ops._extract_consult_date_regex
+        monkeypatch.setattr(
+            ops, "_extract_consult_date_regex", lambda text: calls.append(text) or regex(text)
+        )
+        path = ops.init_db(tmp_path / "db.csv")
+        ops.append_rows_locked(path, pd.DataFrame([self._record("8000000001", 1, "a")]))
+        assert len(calls) == 1
+
+        ops.append_records_locked(path, [self._record("8000000001", 2, "b")])
+        assert len(calls) == 2
+        assert list(ops.load_db(path)["CONSULT_DATE"]) == ["2021/1/1", "2021/1/2"]
+
+    def test_appender_session_matches_full_rewrite(self, tmp_path):
+        import pandas as pd
+        from src.database.ops import DBAppender, append_rows_locked, init_db
+
+        batches = [
+            [("8000000001", 5, "a")],
+            [("8000000001", 9, "b"), ("8000000002", 1, "c")],
+            [("8000000001", 2, "d")],  # re-ranks: rewrite in the middle of the session
+            [("8000000002", 3, "e")],
+        ]
+        full = init_db(tmp_path / "full.csv")
+        fast = init_db(tmp_path / "fast.csv")
+        with DBAppender(fast) as appender:
+            for batch in batches:
+                records = [self._record(*spec) for spec in batch]
+                append_rows_locked(full, pd.DataFrame(records))
+                appender.append(records)
+                assert fast.read_bytes() == full.read_bytes()
+
+    def test_in_place_append_keeps_existing_bytes(self, tmp_path):
+        from src.database.ops import append_records_locked, init_db, load_db
+
+        path = init_db(tmp_path / "db.csv")
+        append_records_locked(path, [self._record("8000000001", 1, "a")])
+        before = path.read_bytes()
+
+        append_records_locked(path, [self._record("8000000001", 9, "b")])
+        assert path.read_bytes().startswith(before)
+        assert list(load_db(path)["ORDER"]) == [1, 2]
+
+
+class TestDuplicateIndex:
+    """build_duplicate_index keys document digests by IPP."""
+
+    @pytest.mark.parametrize("use_xxhash", [True, False])
+    def test_lookup(self, monkeypatch, use_xxhash):
+        import pandas as pd
+        from src.database import ops
+        from src.database.ops import build_duplicate_index, document_digest
+
+        if not use_xxhash:
+            monkeypatch.setattr(ops, "xxhash", None)
+        elif ops.xxhash is None:
+            pytest.skip("xxhash not installed")
+
+        df = pd.DataFrame(
+            {"IPP": ["8000000001", "8000000002"], "DOCUMENT": ["same text", "other"]}
+        )
+        index = build_duplicate_index(df)
+
+        assert document_digest("same text") in index["8000000001"]
+        # same document under another IPP is not a duplicate
+        assert document_digest("same text") not in index["8000000002"]
+        assert document_digest("new") not in index["8000000003"]
+
+    def test_empty_db(self):
+        from src.database.ops import DEFAULT_COLUMNS, build_duplicate_index
+        import pandas as pd
+
+        assert not build_duplicate_index(pd.DataFrame(columns=DEFAULT_COLUMNS))
+
+
+class TestFileIndex:
+    """(size, mtime) index of committed files, kept next to the DB."""
+
+    def test_roundtrip_and_pruning(self, tmp_path):
+        import pandas as pd
+        from src.database.ops import file_stat_key, load_file_index, save_file_index
+
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        db = tmp_path / "db.csv"
+        save_file_index(db, {str(pdf): file_stat_key(pdf), "/gone.pdf": (1, 2)})
+
+        df = pd.DataFrame({"SOURCE_FILE": [str(pdf)]})
+        assert load_file_index(db, df) == {str(pdf): file_stat_key(pdf)}
+
+        pdf.write_bytes(b"%PDF-1.4 changed")
+        assert load_file_index(db, df)[str(pdf)] != file_stat_key(pdf)
+
+    def test_missing_or_corrupt(self, tmp_path):
+        import pandas as pd
+        from src.database.ops import file_index_path, load_file_index
+
+        db = tmp_path / "db.csv"
+        df = pd.DataFrame({"SOURCE_FILE": ["/a.pdf"]})
+        assert load_file_index(db, df) == {}
+        file_index_path(db).write_text("{not json")
+        assert load_file_index(db, df) == {}
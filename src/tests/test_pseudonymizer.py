@@ -1,5 +1,7 @@
 """Tests for src/database/pseudonymizer.py, NER-based pseudonymization."""
 
+import re
+
 import pytest
 
 
@@ -17,3 +19,67 @@ class TestPseudonymizer:
     @pytest.mark.skip(reason="Phase 0 placeholder, implement in next iteration")
     def test_long_document_chunking(self):
         pass
+
+
+class _Ent:
+    def __init__(self, m):
+        self.start_char, self.end_char = m.start(), m.end()
+        self.label_ = "NOM"
+
+
+class _Doc:
+    def __init__(self, text):
+        self.ents = [_Ent(m) for m in re.finditer(r"\b[A-Z]{4,}\b", text)]
+
+
+class _StubNLP:
+    """Tags upper-case words as NOM; counts model invocations."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return _Doc(text)
+
+    def pipe(self, texts, batch_size=None):
+        self.calls += 1
+        for text in texts:
+            yield _Doc(text)
+
+
+class TestPseudonymizeBatch:
+    """pseudonymize_batch gives the same output as pseudonymize, in one pipe call."""
+
+    @pytest.fixture
+    def pseudonymizer(self):
+        pytest.importorskip("edsnlp")
+        from src.database.pseudonymizer import TextPseudonymizer
+
+        tp = TextPseudonymizer.__new__(TextPseudonymizer)
+        tp.secret_salt = "salt"
+        tp.keep = ["IPP", "NDA", "DATE", "HOPITAL"]
+        tp.nlp = _StubNLP()
+        return tp
+
+    def test_matches_single_calls(self, pseudonymizer):
+        texts = [
+            "Patient DUPONT vu par Dr TOUAT.",
+            "Rien a signaler.",
+            ("Compte rendu MARTIN. " * 120).strip(),  # several model chunks
+        ]
+        ipps = ["8000000001", "8000000002", "8000000001"]
+
+        expected = [
+            pseudonymizer.pseudonymize(t, ipp=i, keep_practitioner_names=True)
+            for t, i in zip(texts, ipps)
+        ]
+        pseudonymizer.nlp.calls = 0
+
+        assert pseudonymizer.pseudonymize_batch(texts, ipps=ipps) == expected
+        assert pseudonymizer.nlp.calls == 1
+        assert "DUPONT" not in expected[0] and "TOUAT" in expected[0]
+
+    def test_ipps_length_mismatch(self, pseudonymizer):
+        with pytest.raises(ValueError):
+            pseudonymizer.pseudonymize_batch(["a", "b"], ipps=["8000000001"])
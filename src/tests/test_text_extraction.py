@@ -13,3 +13,34 @@ class TestTextExtraction:
     @pytest.mark.skip(reason="Phase 0 placeholder, implement in next iteration")
     def test_scanned_pdf_detection(self):
         pass
+
+
+class TestPdfBytes:
+    """pdf_to_text reads the PDF once and hands the same bytes to each stage."""
+
+    def test_scan_check_and_edspdf_share_bytes(self, tmp_path, monkeypatch):
+        from types import SimpleNamespace
+
+        from src.database import text_extraction
+
+        pdf = tmp_path / "doc.pdf"
+        pdf.write_bytes(b"%PDF-1.4 fake")
+        seen = []
+
+        def fake_pipeline(data):
+            seen.append(("edspdf", data))
+            body = SimpleNamespace(text="Consultation du 01/02/2024")
+            return SimpleNamespace(aggregated_texts={"body": body})
+
+        def fake_is_scanned(path, min_chars_per_page=30, data=None):
+            seen.append(("scan", data))
+            return False
+
+        monkeypatch.setattr(text_extraction, "make_extractor", lambda: fake_pipeline)
+        monkeypatch.setattr(text_extraction, "_is_scanned_pdf", fake_is_scanned)
+
+        text = text_extraction.TextExtractor().pdf_to_text(pdf)
+
+        assert "01/02/2024" in text
+        assert seen == [("scan", b"%PDF-1.4 fake"), ("edspdf", b"%PDF-1.4 fake")]
+        assert seen[0][1] is seen[1][1]
@@ -1,5 +1,10 @@
 """Tests for src/database/utils.py, HuggingFace model loading and EDS-NLP setup."""
 
+import subprocess
+import sys
+import types
+from pathlib import Path
+
 import pytest
 
 
@@ -13,3 +18,80 @@ class TestUtils:
     @pytest.mark.skip(reason="Phase 0 placeholder, implement in next iteration")
     def test_eds_nlp_registry_setup(self):
         pass
+
+
+class TestModelDownload:
+    """_download_eds_model marks a finished snapshot download."""
+
+    @staticmethod
+    def _fake_hub(monkeypatch, snapshot_download):
+        hub = types.ModuleType("huggingface_hub")
+        hub.snapshot_download = snapshot_download
+        monkeypatch.setitem(sys.modules, "huggingface_hub", hub)
+
+    def test_marker_written_after_download(self, tmp_path, monkeypatch):
+        from src.database import utils
+
+        calls = []
+
+        def fake_snapshot_download(**kwargs):
+            calls.append(kwargs)
+            (Path(kwargs["local_dir"]) / "artifacts").mkdir(parents=True, exist_ok=True)
+
+        self._fake_hub(monkeypatch, fake_snapshot_download)
+        artifacts = utils._download_eds_model(tmp_path / "hf_cache")
+
+        assert artifacts == tmp_path / "hf_cache" / "artifacts"
+        assert (tmp_path / "hf_cache" / utils.COMPLETE_MARKER).exists()
+        assert "local_dir_use_symlinks" not in calls[0]
+
+    def test_no_marker_when_artifacts_missing(self, tmp_path, monkeypatch):
+        from src.database import utils
+
+        self._fake_hub(monkeypatch, lambda **kwargs: None)
+        with pytest.raises(FileNotFoundError):
+            utils._download_eds_model(tmp_path / "hf_cache")
+        assert not (tmp_path / "hf_cache" / utils.COMPLETE_MARKER).exists()
+
+    def test_import_does_not_load_hub(self):
+        code = (
+            "import sys, src.database.utils; "
+            "sys.exit('huggingface_hub' in sys.modules)"
+        )
+        repo = Path(__file__).resolve().parents[2]
+        assert subprocess.run([sys.executable, "-c", code], cwd=repo).returncode == 0
+
+
+class TestEDSRegistry:
+    """prepare_eds_registry walks the eds_pseudo package once per process."""
+
+    def test_second_call_is_a_no_op(self, tmp_path, monkeypatch):
+        from src.database import utils
+
+        pkg = tmp_path / "eds_pseudo"
+        (pkg / "pipes").mkdir(parents=True)
+        (pkg / "__init__.py").write_text("")
+        (pkg / "pipes" / "__init__.py").write_text("")
+        (pkg / "pipes" / "dates.py").write_text("import builtins\nbuiltins._eds_test_imports += 1\n")
+
+        monkeypatch.setattr(utils, "_REGISTERED_ROOTS", set())
+        monkeypatch.setattr("builtins._eds_test_imports", 0, raising=False)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        for name in [m for m in sys.modules if m.split(".")[0] == "eds_pseudo"]:
+            monkeypatch.delitem(sys.modules, name)
+
+        walks = []
+        walk = utils.pkgutil.walk_packages
+        monkeypatch.setattr(
+            utils.pkgutil, "walk_packages", lambda *a, **k: walks.append(a) or walk(*a, **k)
+        )
+        try:
+            utils.prepare_eds_registry(tmp_path)
+            utils.prepare_eds_registry(tmp_path)
+            import builtins
+
+            assert builtins._eds_test_imports == 1
+            assert [prefix for _, prefix, *_ in walks].count("eds_pseudo.") == 1
+        finally:
+            for name in [m for m in sys.modules if m.split(".")[0] == "eds_pseudo"]:
+                del sys.modules[name]
@@ -2,14 +2,25 @@ from __future__ import annotations
 
 import os
 import sys
+import time
 import argparse
+from contextlib import contextmanager
+import functools
+import gc
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 import concurrent.futures as cf
+import sqlite3
+import multiprocessing as mp
+from typing import TYPE_CHECKING, Iterator
 
-import pandas as pd
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt, QSettings, QSize, QObject, QThread, Signal
+from PySide6.QtCore import (
+    Qt, QSettings, QSize, QObject, QRunnable, QThread, QThreadPool, QTimer, Signal,
+)
 from PySide6.QtWidgets import (
+    QAbstractItemView,
     QFrame,
     QApplication,
     QFileDialog,
@@ -35,19 +46,49 @@ if PATH_TO_SRC_FOLDER not in sys.path:
 
 from src.database.ops import (
     init_db,
-    append_rows_locked,
+    DBAppender,
+    build_duplicate_index,
+    document_digest,
+    file_stat_key,
     load_db,
+    load_file_index,
+    save_file_index,
     DEFAULT_COLUMNS,
-    extract_IPP_from_document,
-    extract_IPP_from_path,
+    INDEX_COLUMNS,
+    extract_document,
+    read_db_columns,
 )
-from src.database.pseudonymizer import TextPseudonymizer
+from src.database.extract_cache import ExtractCache, purge_cache
+from src.database.extract_cache import cache_path as extract_cache_path
+from src.database.near_duplicates import NearDuplicateIndex, minhash_signature
+from src.database.text_extraction import init_worker as init_extraction_worker
 from src.database.security import get_or_create_salt_file
-from src.database.text_extraction import TextExtractor
 from src.database.utils import resolve_eds_model_path, prepare_eds_registry
 from src.ui.utils import SleepInhibitor
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    # edsnlp is only imported by EDSInitWorker, off the GUI thread
+    from src.database.pseudonymizer import TextPseudonymizer
+
 CHUNK_SIZE = 1
+_DEFAULT_COLS_FS = frozenset(DEFAULT_COLUMNS)
+_DEFAULT_COLS_TUPLE = tuple(DEFAULT_COLUMNS)
+MAX_WORKERS = max(1, min(os.cpu_count() or 1, 6))
+# Extractions submitted but not yet consumed: bounds how many extracted texts wait in RAM
+# while the GUI thread pseudonymizes.
+MAX_IN_FLIGHT = 2 * MAX_WORKERS
+# Documents pseudonymized per model batch (their chunks go through one nlp.pipe call)
+PSEUDO_BATCH_SIZE = 8
+# Minimum time between two progress updates sent to the dialog (each one is a repaint)
+PROGRESS_INTERVAL_S = 0.1
+# Settings writes are flushed to disk once the user stops toggling for this long.
+SETTINGS_SYNC_DELAY_MS = 250
+# Threads touching newly added PDFs ahead of the commit (I/O-bound, e.g. network drives)
+PREWARM_WORKERS = 4
+# Bytes read from the start of each added file (PDF header, first objects)
+PREWARM_BLOCK_SIZE = 1 << 20
 
 LIGHT_QSS = """
 QMainWindow, QWidget {
@@ -165,6 +206,9 @@ I18N = {
         "btn_add_from_folder": "From Folder…",
         "btn_commit": "Commit to DB",
         "chk_pseudo_only": "Make pseudo-only copy",
+        "chk_skip_near_dups": "Skip near-duplicates",
+        "chk_extract_cache": "Cache extracted texts",
+        "btn_purge_cache": "Purge text cache…",
 
         # tooltips
         "tip_theme_dark": "Switch to dark mode",
@@ -172,9 +216,20 @@ I18N = {
         "tip_lang_to_fr": "Passer en français",
         "tip_lang_to_en": "Switch to English",
         "tip_pseudo_only": (
-            "After each commit, write a sibling CSV named '<db>_pseudo_only.csv' "
-            "containing all columns except DOCUMENT."
+            "After each commit, write a sibling copy named '<db>_pseudo_only.<ext>' "
+            "(same format as the DB) containing all columns except DOCUMENT."
+        ),
+        "tip_skip_near_dups": (
+            "Also skip documents whose text is almost identical to one already stored "
+            "for the same IPP (re-scans, OCR variants). Signatures are cached in "
+            "'<db>_minhash.npz'."
         ),
+        "tip_extract_cache": (
+            "Keep the extracted text of committed documents in '<db>_extract_cache.sqlite', "
+            "keyed by file hash, so that the same PDF is not parsed again. The file holds "
+            "raw (not pseudonymized) text: protect it like the DB, or purge it."
+        ),
+        "tip_purge_cache": "Delete '<db>_extract_cache.sqlite' for the selected database.",
 
         # table
         "table_headers": ["File path", "IPP (auto)", "ORDER (auto)", "Preview"],    
@@ -203,6 +258,7 @@ I18N = {
         "progress_extracting_with_workers": "Extracting text…\nWorkers: {workers}",
         "progress_extracting_step": "Extracting text… ({done}/{total})\n{name}",
         "progress_pseudonymizing_step": "Pseudonymizing extracted texts… ({done}/{total})\n{name}",
+        "progress_processing_step": "Extracting and pseudonymizing… ({done}/{total})\n{name}",
 
         # runtime messages (banner + boxes)
         "eds_loaded_ready": "EDS-PSEUDO model loaded. Ready.",
@@ -275,6 +331,14 @@ I18N = {
         "dlg_confirm_remove_title": "Confirm removal",
         "dlg_confirm_remove_body": "Remove {n} selected document(s) from the list?",
         "no_selection": "No documents are selected.",
+
+        # extraction cache
+        "dlg_confirm_purge_title": "Purge text cache",
+        "dlg_confirm_purge_body": "Delete the cached extracted texts of this database?\n{path}",
+        "cache_purged": "Text cache deleted: {path}",
+        "no_cache_to_purge": "This database has no text cache.",
+        "purge_cache_failed": "Could not delete the text cache: {err}",
+        "purge_during_commit": "Wait for the commit to finish before purging the text cache.",
     },
     "fr": {
         "window_title": "Base Clinique - Import de documents",
@@ -288,15 +352,30 @@ I18N = {
         "btn_add_from_folder": "Depuis un dossier…",
         "btn_commit": "Enregistrer dans la base",
         "chk_pseudo_only": "Créer une copie pseudonymisée",
+        "chk_skip_near_dups": "Ignorer les quasi-doublons",
+        "chk_extract_cache": "Mettre en cache les textes extraits",
+        "btn_purge_cache": "Vider le cache de textes…",
 
         "tip_theme_dark": "Passer en mode sombre",
         "tip_theme_light": "Passer en mode clair",
         "tip_lang_to_fr": "Passer en français",
         "tip_lang_to_en": "Switch to English",
         "tip_pseudo_only": (
-            "Après chaque enregistrement, écrire un CSV frère nommé '<db>_pseudo_only.csv' "
-            "contenant toutes les colonnes sauf DOCUMENT."
+            "Après chaque enregistrement, écrire une copie nommée '<db>_pseudo_only.<ext>' "
+            "(même format que la base) contenant toutes les colonnes sauf DOCUMENT."
+        ),
+        "tip_skip_near_dups": (
+            "Ignorer aussi les documents dont le texte est presque identique à un document "
+            "déjà enregistré pour le même IPP (re-numérisations, variantes OCR). Les "
+            "signatures sont mises en cache dans '<db>_minhash.npz'."
+        ),
+        "tip_extract_cache": (
+            "Conserver le texte extrait des documents enregistrés dans "
+            "'<db>_extract_cache.sqlite', indexé par empreinte du fichier, pour ne pas "
+            "analyser deux fois le même PDF. Ce fichier contient le texte brut (non "
+            "pseudonymisé) : protégez-le comme la base, ou videz-le."
         ),
+        "tip_purge_cache": "Supprimer '<db>_extract_cache.sqlite' pour la base sélectionnée.",
 
         "table_headers": ["Chemin du fichier", "IPP (auto)", "ORDER (auto)", "Aperçu"],
 
@@ -320,6 +399,7 @@ I18N = {
         "progress_extracting_with_workers": "Extraction du texte…\nWorkers : {workers}",
         "progress_extracting_step": "Extraction du texte… ({done}/{total})\n{name}",
         "progress_pseudonymizing_step": "Pseudonymisation des textes extraits… ({done}/{total})\n{name}",
+        "progress_processing_step": "Extraction et pseudonymisation… ({done}/{total})\n{name}",
 
         "eds_loaded_ready": "Modèle EDS-PSEUDO chargé. Prêt.",
         "model_not_initialized": (
@@ -388,10 +468,140 @@ I18N = {
         "dlg_confirm_remove_title": "Confirmer la suppression",
         "dlg_confirm_remove_body": "Supprimer {n} document(s) sélectionné(s) de la liste ?",
         "no_selection": "Aucun document sélectionné.",
+
+        "dlg_confirm_purge_title": "Vider le cache de textes",
+        "dlg_confirm_purge_body": "Supprimer les textes extraits en cache pour cette base ?\n{path}",
+        "cache_purged": "Cache de textes supprimé : {path}",
+        "no_cache_to_purge": "Cette base n'a pas de cache de textes.",
+        "purge_cache_failed": "Impossible de supprimer le cache de textes : {err}",
+        "purge_during_commit": "Attendez la fin de l'enregistrement avant de vider le cache de textes.",
     },
 }
 
 
+@dataclass(slots=True)
+class CommitRow:
+    """One document going through commit(): extracted, then pseudonymized, then appended."""
+    path: Path  # already resolved (see MainWindow._add_rows)
+    ipp: str
+    document: str
+    pseudo: str = ""
+    order: int = 1
+    stat: tuple[int, int] | None = None  # (size, mtime_ns) when the file was read
+    digest: int = 0  # document_digest(document)
+    sig: np.ndarray | None = None  # MinHash signature, when near-duplicates are checked
+    cache_key: str | None = None  # file hash, when the text is to be cached once committed
+
+
+def _rows_to_records(rows: list[CommitRow]) -> list[dict]:
+    """DB row dicts for DBAppender.append."""
+    return [
+        {
+            "IPP": r.ipp,
+            "SOURCE_FILE": str(r.path),
+            "DOCUMENT": r.document,
+            "PSEUDO": r.pseudo,
+            "ORDER": r.order,
+        }
+        for r in rows
+    ]
+
+
+@functools.lru_cache(maxsize=8)
+def _resolved(db_path: str) -> Path:
+    """Absolute DB path, resolved once per path string (cleared when a DB is chosen/created)."""
+    return Path(db_path).expanduser().resolve()
+
+
+def _resolve_in_dir(file_path: str, resolved_dirs: dict[str, str]) -> str:
+    """
+    Absolute path of *file_path*, resolving each parent directory only once (cached in
+    *resolved_dirs*); only a symlinked file itself is resolved on its own.
+    """
+    if os.path.islink(file_path):
+        return str(Path(file_path).resolve())
+    parent, name = os.path.split(os.path.abspath(os.path.expanduser(file_path)))
+    if parent not in resolved_dirs:
+        resolved_dirs[parent] = str(Path(parent).resolve())
+    return os.path.join(resolved_dirs[parent], name)
+
+
+def _missing_db_columns(columns) -> list[str]:
+    """Return the DEFAULT_COLUMNS absent from *columns* (empty when the schema is valid)."""
+    # Common case: the DB was created with DEFAULT_COLUMNS, in that order.
+    if tuple(columns[: len(_DEFAULT_COLS_TUPLE)]) == _DEFAULT_COLS_TUPLE:
+        return []
+    return sorted(_DEFAULT_COLS_FS.difference(columns))
+
+
+def _contiguous_runs(rows: list[int]) -> list[tuple[int, int]]:
+    """(first, count) of each run of consecutive values in the sorted *rows*."""
+    runs: list[tuple[int, int]] = []
+    for r in rows:
+        if runs and runs[-1][0] + runs[-1][1] == r:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((r, 1))
+    return runs
+
+
+@contextmanager
+def _updates_suspended(widget: QWidget):
+    """Batch several view changes into a single repaint of *widget*."""
+    widget.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        widget.setUpdatesEnabled(True)
+
+
+def _make_executor() -> cf.Executor:
+    """
+    Long-lived process pool used for PDF text extraction (parsing is CPU-bound and
+    would be serialized by the GIL in threads).
+
+    POSIX: forkserver context (workers are forked from a clean server process, not
+    from the Qt GUI process). Windows: spawn, the only option there; its start-up
+    cost is paid once per worker since the pool is reused across commits. Each worker
+    builds its TextExtractor when it starts.
+    """
+    method = "spawn" if sys.platform == "win32" else "forkserver"
+    return cf.ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        mp_context=mp.get_context(method),
+        initializer=init_extraction_worker,
+    )
+
+
+def _prewarm_file(path: str) -> None:
+    """
+    Stat *path* and read its first PREWARM_BLOCK_SIZE bytes, so that the commit finds
+    its metadata and header in the OS cache. Only one block: listing a large folder
+    must not queue a full read of it. Errors are left for the commit to report.
+    """
+    try:
+        os.stat(path)
+        with open(path, "rb", buffering=0) as fh:
+            fh.read(PREWARM_BLOCK_SIZE)
+    except OSError:
+        pass
+
+
+class CommitLogWriter(QRunnable):
+    """Runs one commit log write (MainWindow._write_commit_log) on the log thread pool."""
+
+    def __init__(self, write, **kwargs):
+        super().__init__()
+        self.write = write
+        self.kwargs = kwargs
+
+    def run(self) -> None:
+        try:
+            self.write(**self.kwargs)
+        except Exception:
+            pass  # Never fail the commit over a log write issue
+
+
 class EDSInitWorker(QObject):
     finished = Signal(object)  # emits TextPseudonymizer instance
     failed = Signal(str)  # emits error message
@@ -402,6 +612,8 @@ class EDSInitWorker(QObject):
 
     def run(self) -> None:
         try:
+            from src.database.pseudonymizer import TextPseudonymizer
+
             artifacts_path = resolve_eds_model_path(self.eds_path)
             prepare_eds_registry(artifacts_path.parent)
 
@@ -416,11 +628,376 @@ class EDSInitWorker(QObject):
             self.failed.emit(str(e))
 
 
+@dataclass(slots=True)
+class CommitResult:
+    """What CommitWorker reports once every file of the commit has been handled."""
+    skipped: list[str] = field(default_factory=list)
+    near_skipped: list[str] = field(default_factory=list)  # "name (~similarity)"
+    errors: list[str] = field(default_factory=list)
+    committed_files: list[str] = field(default_factory=list)
+    n_candidates: int = 0
+    pool_error: Exception | None = None
+    pseudo_only_path: Path | None = None  # set once the pseudo-only copy is written
+    pseudo_only_error: Exception | None = None
+
+
+@dataclass(slots=True)
+class CommitSession:
+    """GUI-side state of the running commit (progress display only)."""
+    db_path: str
+    total: int
+    dlg: QProgressDialog
+    step_fmt: str  # progress label template, looked up once per commit
+    n_skipped: int = 0
+
+
+class CommitWorker(QObject):
+    """
+    Everything of one commit that touches files, off the GUI thread: locking and
+    reading the DB for the duplicate and (size, mtime) indexes, extraction (on the
+    shared process pool), IPP resolution, duplicate checks, batched pseudonymization,
+    appends to the DB through *appender* (opened and closed by the worker), the
+    (size, mtime) index and the optional pseudo-only copy.
+    """
+    progress = Signal(int, int, str)  # files handled, duplicates skipped, last file name
+    committed = Signal(int, int)  # files committed so far, errors so far
+    finished = Signal(object)  # emits CommitResult
+    failed = Signal(str)  # emits error message
+
+    def __init__(
+        self,
+        pool: cf.Executor,
+        pseudonymizer: TextPseudonymizer,
+        paths: list[Path],
+        appender: DBAppender,
+        near_dups: bool = False,
+        extract_cache: str | None = None,
+        pseudo_only_dst: Path | None = None,
+    ):
+        super().__init__()
+        self.pool = pool
+        self.pseudonymizer = pseudonymizer
+        self.paths = paths
+        self.appender = appender
+        self.near_dups = near_dups
+        # Built from the DB by _prepare
+        self.dup_index: dict[str, set[int]] = {}
+        self.near_index: NearDuplicateIndex | None = None
+        self.file_index: dict[str, tuple[int, int]] = {}
+        self.extract_cache = extract_cache
+        self.pseudo_only_dst = pseudo_only_dst
+        self._pending: list[CommitRow] = []
+        # (IPP, digest) of the documents of this commit not yet in the DB -> (file name,
+        # later copies of the same document). The copies are reported as duplicates
+        # only once the first one is committed: dup_index only holds stored documents.
+        self._in_commit: dict[tuple[str, int], tuple[str, list[str]]] = {}
+        self._text_cache: ExtractCache | None = None  # this thread's writer
+        self._last_progress_ts = 0.0
+        self._last_committed_ts = 0.0
+
+    def run(self) -> None:
+        result = CommitResult()
+        try:
+            self._prepare()
+            self._process(result)
+        except Exception as e:
+            self._finish(result)  # keep what was already pseudonymized
+            self.failed.emit(str(e))
+            return
+
+        self._finish(result, sync_copy=result.n_candidates > 0)
+        self.finished.emit(result)
+
+    def _prepare(self) -> None:
+        """
+        Lock the DB for the whole commit (chunks are then appended without re-locking or
+        re-opening), then build the exact (and optionally near) duplicate indexes and
+        the (size, mtime) index from the locked DB.
+        """
+        self.appender.open()
+
+        # Only what the indexes need: PSEUDO texts are never read back during a commit
+        db_path = self.appender.db_path
+        df_db = load_db(db_path, columns=INDEX_COLUMNS)
+        self.dup_index = build_duplicate_index(df_db)
+        self.file_index = load_file_index(db_path, df_db)
+        if self.near_dups:
+            self.near_index = NearDuplicateIndex.for_db(db_path, df_db)
+        # Only the indexes are kept: release the DB frame before extraction starts
+        del df_db
+        gc.collect()
+
+    def _process(self, result: CommitResult) -> None:
+        errors = result.errors
+
+        paths = iter(self.paths)
+        in_flight: dict[cf.Future, tuple[Path, tuple[int, int] | None]] = {}
+        to_pseudo: list[CommitRow] = []
+        done_count = self._submit_more(paths, in_flight, result, 0)
+
+        while in_flight:
+            done, _ = cf.wait(in_flight, return_when=cf.FIRST_COMPLETED)
+
+            for fut in done:
+                p, stat = in_flight.pop(fut)
+                try:
+                    # Text extraction and IPP resolution both ran in the pool worker
+                    _, text, ipp, cache_key = fut.result()
+                except cf.BrokenExecutor as e:
+                    result.pool_error = e
+                    errors.append(f"[Extraction] {p.name}: {e}")
+                    continue
+                except Exception as e:
+                    errors.append(f"[Extraction] {p.name}: {e}")
+                    continue
+
+                digest = document_digest(text)
+                if digest in self.dup_index[ipp]:
+                    result.skipped.append(p.name)
+                    continue
+                first = self._in_commit.get((ipp, digest))
+                if first is not None:
+                    # Same document earlier in this commit: settled with that one
+                    first[1].append(p.name)
+                    continue
+
+                sig = None
+                if self.near_index is not None:
+                    # Against committed documents only (added in _settle)
+                    sig = minhash_signature(text)
+                    similarity = self.near_index.find(ipp, sig)
+                    if similarity is not None:
+                        result.near_skipped.append(f"{p.name} (~{similarity:.0%})")
+                        continue
+
+                self._in_commit[(ipp, digest)] = (p.name, [])
+                result.n_candidates += 1
+                to_pseudo.append(CommitRow(
+                    path=p, ipp=ipp, document=text, stat=stat, digest=digest, sig=sig,
+                    cache_key=cache_key,
+                ))
+
+            done_count += len(done)
+            # Refill the pool before the model pass, so that extraction goes on meanwhile
+            done_count = self._submit_more(paths, in_flight, result, done_count)
+
+            # Pseudonymize in batches (one model pass per batch)
+            if to_pseudo and (len(to_pseudo) >= PSEUDO_BATCH_SIZE or not in_flight):
+                done_rows = self._pseudonymize_rows(to_pseudo, errors)
+                if len(done_rows) < len(to_pseudo):
+                    done_ids = {id(r) for r in done_rows}
+                    self._settle([r for r in to_pseudo if id(r) not in done_ids], result, False)
+                self._pending.extend(done_rows)
+                to_pseudo.clear()
+                if len(self._pending) >= CHUNK_SIZE:
+                    self._flush(result)
+
+            self._emit_progress(done_count, len(result.skipped), p.name)
+
+        # Files never submitted because the pool broke
+        if result.pool_error is not None:
+            for p in paths:
+                errors.append(f"[Extraction] {p.name}: {result.pool_error}")
+
+    def _submit_more(
+        self,
+        paths: Iterator[Path],
+        in_flight: dict[cf.Future, tuple[Path, tuple[int, int] | None]],
+        result: CommitResult,
+        done_count: int,
+    ) -> int:
+        """
+        Submit files to the pool until MAX_IN_FLIGHT are in flight (bounding how many
+        finished texts can wait), unless the pool broke or the commit was interrupted.
+        Files unchanged since they were committed are skipped without being opened.
+        Returns the updated count of handled files.
+        """
+        if result.pool_error is not None or QThread.currentThread().isInterruptionRequested():
+            return done_count
+        n_unchanged = 0
+        while len(in_flight) < MAX_IN_FLIGHT:
+            p = next(paths, None)
+            if p is None:
+                break
+            try:
+                stat = file_stat_key(p)
+            except OSError:
+                stat = None  # reported by the extraction
+            if stat is not None and self.file_index.get(str(p)) == stat:
+                # Same file as an already committed one: not even opened
+                result.skipped.append(p.name)
+                n_unchanged += 1
+                continue
+            fut = self.pool.submit(extract_document, str(p), self.extract_cache)
+            in_flight[fut] = (p, stat)
+        if n_unchanged:
+            done_count += n_unchanged
+            self._emit_progress(done_count, len(result.skipped), result.skipped[-1])
+        return done_count
+
+    def _flush(self, result: CommitResult) -> None:
+        """
+        Try to commit the pending rows to the DB.
+        If the chunk fails, fall back to row-by-row commits so that
+        one bad file does not prevent the rest from being saved.
+        """
+        rows = self._pending
+        if not rows:
+            return
+        self._pending = []
+
+        committed: list[CommitRow] = []
+        try:
+            self.appender.append(_rows_to_records(rows))
+            committed = rows
+        except Exception:
+            # Chunk failed, try rows individually to salvage what we can
+            for row in rows:
+                try:
+                    self.appender.append(_rows_to_records([row]))
+                    committed.append(row)
+                except Exception as row_err:
+                    result.errors.append(f"[Commit] {row.path.name}: {row_err}")
+                    self._settle([row], result, False)
+
+        self._settle(committed, result, True)
+        self._cache_texts(committed)
+        result.committed_files.extend(r.path.name for r in committed)
+        self.file_index.update((str(r.path), r.stat) for r in committed if r.stat is not None)
+        self._emit_committed(result)
+
+    def _settle(self, rows: list[CommitRow], result: CommitResult, committed: bool) -> None:
+        """
+        Once *rows* are committed (or failed): committed documents go into the duplicate
+        indexes and their later copies in this commit are reported as duplicates; the
+        copies of failed documents are reported as errors, as they were not stored.
+        """
+        for row in rows:
+            _, copies = self._in_commit.pop((row.ipp, row.digest), (None, []))
+            if committed:
+                self.dup_index[row.ipp].add(row.digest)
+                if self.near_index is not None and row.sig is not None:
+                    self.near_index.add(row.ipp, row.sig)
+                result.skipped.extend(copies)
+            else:
+                result.errors.extend(
+                    f"[Commit] {name}: not committed (same document as {row.path.name})"
+                    for name in copies
+                )
+
+    def _cache_texts(self, rows: list[CommitRow]) -> None:
+        """Store the extracted texts of committed *rows* in the opt-in extraction cache."""
+        rows = [r for r in rows if r.cache_key is not None]
+        if not rows or self.extract_cache is None:
+            return
+        if self._text_cache is None:
+            self._text_cache = ExtractCache(self.extract_cache)
+        try:
+            for row in rows:
+                self._text_cache.put(row.cache_key, row.document)
+        except sqlite3.Error:
+            pass  # Only a cache: the next commit extracts these files again
+
+    def _finish(self, result: CommitResult, sync_copy: bool = False) -> None:
+        """
+        Final flush and pseudo-only copy (still under the DB lock), then sync and unlock
+        the DB and persist the (size, mtime) index.
+        """
+        try:
+            self._flush(result)
+            # Documents still unsettled never reached the DB (the commit failed before)
+            for first, copies in self._in_commit.values():
+                result.errors.extend(
+                    f"[Commit] {name}: not committed (same document as {first})"
+                    for name in copies
+                )
+            self._in_commit.clear()
+            self._emit_committed(result, force=True)
+            if sync_copy and self.pseudo_only_dst is not None:
+                try:
+                    result.pseudo_only_path = self.appender.sync_pseudo_only_copy(
+                        self.pseudo_only_dst
+                    )
+                except Exception as e:
+                    result.pseudo_only_error = e
+        finally:
+            if self._text_cache is not None:
+                self._text_cache.close()
+            try:
+                self.appender.close()
+            except Exception as e:
+                result.errors.append(f"[Commit] {e}")
+
+        if result.committed_files:
+            try:
+                save_file_index(self.appender.db_path, self.file_index)
+            except Exception:
+                pass  # Only a cache: the duplicate check still runs on extracted text
+
+    def _emit_progress(self, done: int, skipped: int, name: str) -> None:
+        """Emit progress at most every PROGRESS_INTERVAL_S, and always for the last file."""
+        now = time.monotonic()
+        if done < len(self.paths) and now - self._last_progress_ts < PROGRESS_INTERVAL_S:
+            return
+        self._last_progress_ts = now
+        self.progress.emit(done, skipped, name)
+
+    def _emit_committed(self, result: CommitResult, force: bool = False) -> None:
+        """Emit the committed/error counts at most every PROGRESS_INTERVAL_S (unless *force*)."""
+        now = time.monotonic()
+        if not force and now - self._last_committed_ts < PROGRESS_INTERVAL_S:
+            return
+        self._last_committed_ts = now
+        self.committed.emit(len(result.committed_files), len(result.errors))
+
+    def _pseudonymize_rows(self, rows: list[CommitRow], errors: list[str]) -> list[CommitRow]:
+        """
+        Fill PSEUDO for *rows* with a single batched model call. If the batch fails,
+        rows are retried one by one so that one bad document does not drop the others.
+        Returns the pseudonymized rows; failures are appended to *errors*.
+        """
+        try:
+            pseudos = self.pseudonymizer.pseudonymize_batch(
+                [r.document for r in rows],
+                ipps=[r.ipp for r in rows],
+                keep_practitioner_names=True,
+            )
+        except Exception:
+            done: list[CommitRow] = []
+            for row in rows:
+                try:
+                    row.pseudo = self.pseudonymizer.pseudonymize(
+                        row.document,
+                        ipp=row.ipp,
+                        keep_practitioner_names=True,
+                    )
+                    done.append(row)
+                except Exception as e:
+                    errors.append(f"[Pseudonymization] {row.path.name}: {e}")
+            return done
+
+        for row, pseudo in zip(rows, pseudos):
+            row.pseudo = pseudo
+        return list(rows)
+
+
 class MainWindow(QMainWindow):
     def __init__(self, *, eds_path: str | None = None):
         super().__init__()
-        self.sleep_inhibitor = SleepInhibitor()
+        self.sleep_inhibitor = SleepInhibitor.instance()
         self.settings = QSettings("ClinicalDatabase", "DocumentIntake")
+        self._settings_sync_timer = QTimer(self)
+        self._settings_sync_timer.setSingleShot(True)
+        self._settings_sync_timer.setInterval(SETTINGS_SYNC_DELAY_MS)
+        self._settings_sync_timer.timeout.connect(self.settings.sync)
+
+        # File paths currently listed in the table (O(1) dedup when adding documents)
+        self._table_paths: set[str] = set()
+
+        # Running commit (see commit()); None when idle
+        self._commit: CommitSession | None = None
+        self._commit_thread: QThread | None = None
+        self._commit_worker: CommitWorker | None = None
 
         # Language (default EN)
         self.lang = self.settings.value("ui/lang", "en", type=str)
@@ -435,7 +1012,18 @@ class MainWindow(QMainWindow):
         self.db_path_edit = QLineEdit()
         self.db_path_edit.setPlaceholderText(self.tr("placeholder_db"))
 
-        self.extractor = TextExtractor()
+        # Extraction workers are started lazily on first submit and reused across commits
+        self._pool = _make_executor()
+        # Commit logs are appended off the GUI thread; one thread keeps them in commit order
+        self._log_pool = QThreadPool(self)
+        self._log_pool.setMaxThreadCount(1)
+        # Documents are read in the background as soon as they are listed (see _prewarm_file)
+        self._prewarm_pool = cf.ThreadPoolExecutor(
+            max_workers=PREWARM_WORKERS, thread_name_prefix="prewarm"
+        )
+        # Resolved path -> its pending _prewarm_file job; only kept so that the job can be
+        # cancelled when the row is removed (nothing is cached for the commit here)
+        self._prewarm_jobs: dict[str, cf.Future] = {}
 
         # Theme toggle button (icon-only, GitHub style)
         self.btn_theme = QPushButton()
@@ -512,6 +1100,20 @@ class MainWindow(QMainWindow):
         self.chk_pseudo_only.setChecked(True)
         self.chk_pseudo_only.setToolTip(self.tr("tip_pseudo_only"))
 
+        # near-duplicate skipping (opt-in: exact duplicates are always skipped)
+        self.chk_skip_near_dups = QCheckBox(self.tr("chk_skip_near_dups"))
+        self.chk_skip_near_dups.setChecked(False)
+        self.chk_skip_near_dups.setToolTip(self.tr("tip_skip_near_dups"))
+
+        # extracted-text cache (opt-in: it holds raw text) and its purge
+        self.chk_extract_cache = QCheckBox(self.tr("chk_extract_cache"))
+        self.chk_extract_cache.setChecked(False)
+        self.chk_extract_cache.setToolTip(self.tr("tip_extract_cache"))
+
+        self.btn_purge_cache = QPushButton(self.tr("btn_purge_cache"))
+        self.btn_purge_cache.setToolTip(self.tr("tip_purge_cache"))
+        self.btn_purge_cache.clicked.connect(self.purge_extract_cache)
+
         # Selection mode controls
         self._selection_mode = False
 
@@ -553,6 +1155,9 @@ class MainWindow(QMainWindow):
         actions.addWidget(self.chk_select_all)
         actions.addWidget(self.btn_remove_selected)
         actions.addStretch(1)
+        actions.addWidget(self.chk_skip_near_dups)
+        actions.addWidget(self.chk_extract_cache)
+        actions.addWidget(self.btn_purge_cache)
         actions.addWidget(self.chk_pseudo_only)
         actions.addWidget(self.btn_commit)
 
@@ -571,25 +1176,29 @@ class MainWindow(QMainWindow):
         self._apply_translations()
         self._set_message("info", self.msg_body.text())
 
-    def tr(self, key: str, **kwargs) -> str:
+    def tr_template(self, key: str) -> str:
+        """Translated string for *key* with its {placeholders} left for the caller to format."""
         pack = I18N.get(self.lang, I18N["en"])
-        text = pack.get(key, I18N["en"].get(key, key))
+        return pack.get(key, I18N["en"].get(key, key))
+
+    def tr(self, key: str, **kwargs) -> str:
+        text = self.tr_template(key)
         try:
             return text.format(**kwargs)
         except Exception:
             return text
 
-    def _is_duplicate(self, df_db: pd.DataFrame, ipp: str, document: str) -> bool:
-        if df_db.empty:
-            return False
-        return ((df_db["IPP"] == ipp) & (df_db["DOCUMENT"] == document)).any()
+    def _save_setting(self, key: str, value) -> None:
+        """Store a setting in memory; the disk sync is debounced (see closeEvent for the final flush)."""
+        self.settings.setValue(key, value)
+        self._settings_sync_timer.start()
 
     def set_language(self, lang: str) -> None:
         lang = (lang or "").lower().strip()
         if lang not in ("en", "fr"):
             lang = "en"
         self.lang = lang
-        self.settings.setValue("ui/lang", self.lang)
+        self._save_setting("ui/lang", self.lang)
         self._apply_translations()
 
     def toggle_language(self) -> None:
@@ -609,6 +1218,12 @@ class MainWindow(QMainWindow):
         self.btn_commit.setText(self.tr("btn_commit"))
         self.chk_pseudo_only.setText(self.tr("chk_pseudo_only"))
         self.chk_pseudo_only.setToolTip(self.tr("tip_pseudo_only"))
+        self.chk_skip_near_dups.setText(self.tr("chk_skip_near_dups"))
+        self.chk_skip_near_dups.setToolTip(self.tr("tip_skip_near_dups"))
+        self.chk_extract_cache.setText(self.tr("chk_extract_cache"))
+        self.chk_extract_cache.setToolTip(self.tr("tip_extract_cache"))
+        self.btn_purge_cache.setText(self.tr("btn_purge_cache"))
+        self.btn_purge_cache.setToolTip(self.tr("tip_purge_cache"))
 
         # Selection mode controls
         self.btn_select_mode.setText(
@@ -713,7 +1328,7 @@ class MainWindow(QMainWindow):
             theme = "dark"
 
         self.theme = theme
-        self.settings.setValue("ui/theme", self.theme)
+        self._save_setting("ui/theme", self.theme)
 
         if self.theme == "dark":
             self.btn_theme.setChecked(True)
@@ -790,7 +1405,7 @@ class MainWindow(QMainWindow):
             folder = folder.resolve()
         except Exception:
             pass
-        self.settings.setValue(key, str(folder))
+        self._save_setting(key, str(folder))
 
     def choose_db(self):
         start_dir = self._get_last_dir("paths/select_db")
@@ -798,9 +1413,10 @@ class MainWindow(QMainWindow):
             self,
             self.tr("dlg_select_db_title"),
             start_dir,
-            "CSV files (*.csv);;All files (*.*)",
+            "CSV files (*.csv);;Parquet files (*.parquet);;All files (*.*)",
         )
         if path:
+            _resolved.cache_clear()
             self.db_path_edit.setText(path)
             self._set_message("info", self.tr("selected_db", path=path))
             self._set_last_dir("paths/select_db", path)
@@ -813,10 +1429,11 @@ class MainWindow(QMainWindow):
             self,
             self.tr("dlg_create_db_title"),
             default_path,
-            "CSV files (*.csv)",
+            "CSV files (*.csv);;Parquet files (*.parquet)",
         )
         if not path:
             return
+        _resolved.cache_clear()
         try:
             init_db(path, columns=DEFAULT_COLUMNS)
             get_or_create_salt_file(path)
@@ -838,8 +1455,15 @@ class MainWindow(QMainWindow):
         if not folder:
             return
 
-        folder_path = Path(folder)
-        pdf_files = sorted(folder_path.glob("*.pdf"))
+        # One directory pass; DirEntry answers is_file()/is_symlink() from the listing itself.
+        # The folder is resolved once: only symlinked entries need resolving on their own.
+        folder_resolved = str(Path(folder).resolve())
+        with os.scandir(folder_resolved) as it:
+            pdf_files = sorted(
+                str(Path(e.path).resolve()) if e.is_symlink() else e.path
+                for e in it
+                if e.name.lower().endswith(".pdf") and e.is_file()
+            )
 
         if not pdf_files:
             self._info(self.tr("no_docs_selected"))
@@ -847,19 +1471,7 @@ class MainWindow(QMainWindow):
 
         self._set_last_dir("paths/documents", folder)
 
-        existing = {
-            self.table.item(r, 0).text().strip()
-            for r in range(self.table.rowCount())
-            if self.table.item(r, 0)
-        }
-
-        added = 0
-        for p in pdf_files:
-            fp = str(p.resolve())
-            if fp in existing:
-                continue
-            self._add_row(fp)
-            added += 1
+        added = self._add_rows([(fp, fp) for fp in pdf_files])
 
         self._set_message("info", self.tr("loaded_files_enter_ipp", n=added))
 
@@ -879,287 +1491,241 @@ class MainWindow(QMainWindow):
         self._set_last_dir("paths/documents", files[0])
 
         # Add to table (deduplicate exact same file path already present in the table)
-        existing = set()
-        for r in range(self.table.rowCount()):
-            it = self.table.item(r, 0)
-            if it:
-                existing.add(it.text().strip())
-
-        added = 0
-        for f in files:
-            if f in existing:
-                continue
-            self._add_row(file_path=f)
-            added += 1
+        resolved_dirs: dict[str, str] = {}
+        added = self._add_rows([(f, _resolve_in_dir(f, resolved_dirs)) for f in files])
 
         self._set_message("info", self.tr("loaded_files_enter_ipp", n=added))
 
     def _pseudo_only_path(self, db_path: str) -> Path:
-        p = Path(db_path).expanduser().resolve()
+        p = _resolved(db_path)
         return p.with_name(f"{p.stem}_pseudo_only{p.suffix}")
 
-    def _write_pseudo_only_copy(self, db_path: str) -> None:
-        """
-        Create/overwrite '<db_stem>_pseudo_only.csv' with all DB rows but without DOCUMENT.
-        """
-        src = Path(db_path).expanduser().resolve()
-        dst = self._pseudo_only_path(db_path)
-
-        df_full = load_db(str(src))
-
-        # Drop non-pseudonymized text column if present
-        if "DOCUMENT" in df_full.columns:
-            df_out = df_full.drop(columns=["DOCUMENT"])
-        else:
-            df_out = df_full
-
-        # Write as a full snapshot (simple + robust)
-        df_out.to_csv(dst, index=True)
-
     def commit(self):
-        self.sleep_inhibitor.enable()
-        try:
-            db_path = self.db_path_edit.text().strip()
-            if not db_path:
-                self._error(self.tr("please_select_db_first"))
-                return
+        if self._commit is not None:
+            return  # a commit is already running
 
-            if self.pseudonymizer is None:
-                self._error(self.tr("model_not_initialized"))
-                return
+        db_path = self.db_path_edit.text().strip()
+        if not db_path:
+            self._error(self.tr("please_select_db_first"))
+            return
 
-            try:
-                df_db = load_db(db_path)
-            except Exception as e:
-                self._error(self.tr("could_not_read_db", err=e))
-                return
+        if self.pseudonymizer is None:
+            self._error(self.tr("model_not_initialized"))
+            return
 
-            try:
-                salt = get_or_create_salt_file(db_path)
-                self.pseudonymizer.secret_salt = salt
-            except Exception as e:
-                self._error(self.tr("salt_init_failed", err=e))
-                return
-
-            n = self.table.rowCount()
-            if n == 0:
-                self._error(self.tr("no_docs_selected"))
-                return
-
-            # Logs
-            errors: list[str] = []
-            skipped: list[str] = []
-
-            # -------------------------
-            # Phase 1, Extraction + IPP + duplicate check
-            # -------------------------
-            extract_dlg = self._make_progress(
-                self.tr("progress_commit_title"),
-                self.tr("progress_extracting"),
-                n,
-            )
+        try:
+            missing = _missing_db_columns(read_db_columns(db_path))
+        except Exception as e:
+            self._error(self.tr("could_not_read_db", err=e))
+            return
+        if missing:
+            self._error(self.tr("schema_mismatch", missing=", ".join(missing)))
+            return
 
-            candidates: list[dict] = []
+        try:
+            salt = get_or_create_salt_file(db_path)
+            self.pseudonymizer.secret_salt = salt
+        except Exception as e:
+            self._error(self.tr("salt_init_failed", err=e))
+            return
 
-            for r in range(n):
-                fp = self.table.item(r, 0).text().strip()
-                p = Path(fp)
+        n = self.table.rowCount()
+        if n == 0:
+            self._error(self.tr("no_docs_selected"))
+            return
 
-                try:
-                    text = self.extractor.pdf_to_text(p)
-                    if not text.strip():
-                        raise ValueError("Empty extracted text")
-
-                    try:
-                        ipp = str(int(extract_IPP_from_document(text)))
-                    except Exception:
-                        ipp = str(int(extract_IPP_from_path(p)))
-
-                    if self._is_duplicate(df_db, ipp, text):
-                        skipped.append(p.name)
-                    else:
-                        candidates.append(
-                            {
-                                "path": p,
-                                "ipp": ipp,
-                                "document": text,
-                            }
-                        )
+        # Loading the DB, the indexes and the DB lock (which may have to wait for another
+        # writer) are left to the worker: nothing slow runs on the GUI thread
+        try:
+            self._start_commit(db_path, n)
+        except Exception as e:
+            # The worker never started (and never took the DB lock)
+            if self._commit is not None:
+                self._commit.dlg.close()
+            self._commit = None
+            self._commit_thread = None
+            self._commit_worker = None
+            self.btn_commit.setEnabled(True)
+            self._error(self.tr("commit_failed", err=e))
+
+    def _start_commit(
+        self,
+        db_path: str,
+        n: int,
+    ) -> None:
+        """Progress dialog, session and worker of the commit, then start its thread."""
+        # -------------------------
+        # Extraction + IPP + duplicate check + pseudonymization + persistence run on a
+        # worker thread; the GUI thread only follows progress through signals.
+        # -------------------------
+        self.btn_commit.setEnabled(False)
 
-                except Exception as e:
-                    errors.append(f"[Extraction] {p.name}: {e}")
+        dlg = self._make_progress(
+            self.tr("progress_commit_title"),
+            self.tr("progress_extracting_with_workers", workers=MAX_WORKERS),
+            n,
+        )
+        self._commit = CommitSession(
+            db_path=db_path,
+            total=n,
+            dlg=dlg,
+            step_fmt=self.tr_template("progress_processing_step"),
+        )
 
-                extract_dlg.setValue(r + 1)
-                extract_dlg.setLabelText(
-                    self.tr("progress_extracting_step", done=r + 1, total=n, name=p.name)
-                )
-                QApplication.processEvents()
+        paths = [Path(self.table.item(r, 0).data(Qt.UserRole)) for r in range(n)]
+        self._commit_thread = QThread(self)
+        self._commit_worker = CommitWorker(
+            self._pool,
+            self.pseudonymizer,
+            paths,
+            DBAppender(db_path),
+            self.chk_skip_near_dups.isChecked(),
+            extract_cache=(
+                str(extract_cache_path(_resolved(db_path)))
+                if self.chk_extract_cache.isChecked() else None
+            ),
+            pseudo_only_dst=(
+                self._pseudo_only_path(db_path) if self.chk_pseudo_only.isChecked() else None
+            ),
+        )
+        self._commit_worker.moveToThread(self._commit_thread)
 
-            extract_dlg.close()
+        self._commit_thread.started.connect(self._commit_worker.run)
+        self._commit_worker.progress.connect(self._on_commit_progress)
+        self._commit_worker.committed.connect(self._on_commit_committed)
+        self._commit_worker.finished.connect(self._on_commit_finished)
+        self._commit_worker.failed.connect(self._on_commit_failed)
 
-            if not candidates:
-                self._info(
-                    f"No document to commit.\n\n"
-                    f"Skipped (duplicates): {len(skipped)}\n"
-                    f"Errors: {len(errors)}"
-                )
-                return
-
-            # -------------------------
-            # Phase 2, Pseudonymization + chunked commit
-            # -------------------------
-            pseudo_dlg = self._make_progress(
-                self.tr("progress_commit_title"),
-                self.tr("progress_pseudonymizing"),
-                len(candidates),
-            )
+        # Cleanup
+        self._commit_worker.finished.connect(self._commit_thread.quit)
+        self._commit_worker.failed.connect(self._commit_thread.quit)
+        self._commit_thread.finished.connect(self._commit_worker.deleteLater)
+        self._commit_thread.finished.connect(self._commit_thread.deleteLater)
 
-            pending_rows = []
-            pending_names: list[str] = []
-            committed_files: list[str] = []
+        # Balanced by _end_commit once the worker is done; enabled last so that a setup
+        # error above cannot leave it enabled (enables nest, see SleepInhibitor)
+        self.sleep_inhibitor.enable()
+        self._commit_thread.start()
 
-            try:
-                for i, item in enumerate(candidates, start=1):
-                    p = item["path"]
-
-                    try:
-                        pseudo = self.pseudonymizer.pseudonymize(
-                            item["document"],
-                            ipp=item["ipp"],
-                            keep_practitioner_names=True,
-                        )
-
-                        pending_rows.append(
-                            {
-                                "IPP": item["ipp"],
-                                "SOURCE_FILE": str(p.resolve()),
-                                "DOCUMENT": item["document"],
-                                "PSEUDO": pseudo,
-                                "ORDER": 1,
-                            }
-                        )
-                        pending_names.append(p.name)
-
-                        if len(pending_rows) >= CHUNK_SIZE:
-                            self._flush_pending(
-                                db_path, pending_rows, pending_names,
-                                committed_files, errors,
-                            )
-                            pending_rows.clear()
-                            pending_names.clear()
-
-                            self._set_message(
-                                "info",
-                                f"Committed: {len(committed_files)} | "
-                                f"Skipped: {len(skipped)} | "
-                                f"Errors: {len(errors)}"
-                            )
-
-                    except Exception as e:
-                        errors.append(f"[Pseudonymization] {p.name}: {e}")
-
-                    pseudo_dlg.setValue(i)
-                    pseudo_dlg.setLabelText(
-                        self.tr(
-                            "progress_pseudonymizing_step",
-                            done=i,
-                            total=len(candidates),
-                            name=p.name,
-                        )
-                    )
-                    QApplication.processEvents()
+    def _on_commit_progress(self, done: int, skipped: int, name: str) -> None:
+        s = self._commit
+        s.n_skipped = skipped
+        s.dlg.setValue(done)
+        s.dlg.setLabelText(s.step_fmt.format(done=done, total=s.total, name=name))
 
-                # Final flush
-                if pending_rows:
-                    self._flush_pending(
-                        db_path, pending_rows, pending_names,
-                        committed_files, errors,
-                    )
+    def _on_commit_committed(self, n_committed: int, n_errors: int) -> None:
+        self._set_message(
+            "info",
+            f"Committed: {n_committed} | "
+            f"Skipped: {self._commit.n_skipped} | "
+            f"Errors: {n_errors}"
+        )
 
-            finally:
-                pseudo_dlg.close()
+    def _on_commit_failed(self, err: str) -> None:
+        s = self._commit
+        try:
+            s.dlg.close()
+            self._error(err)
+        finally:
+            self._end_commit()
 
-            # -------------------------
-            # Pseudo-only copy (if requested)
-            # -------------------------
-            pseudo_note = ""
-            if self.chk_pseudo_only.isChecked():
-                try:
-                    self._write_pseudo_only_copy(db_path)
-                    pseudo_path = self._pseudo_only_path(db_path)
-                    pseudo_note = self.tr(
-                        "pseudo_only_copy_note", path=str(pseudo_path)
-                    )
-                except Exception as e:
-                    QMessageBox.warning(
-                        self,
-                        self.tr("pseudo_only_copy_failed_title"),
-                        self.tr(
-                            "pseudo_only_copy_failed_after_commit",
-                            err=e,
-                        ),
-                    )
+    def _on_commit_finished(self, result: CommitResult) -> None:
+        s = self._commit
+        try:
+            s.dlg.close()
+            self._report_commit(s, result)
+        finally:
+            self._end_commit()
+
+    def _end_commit(self) -> None:
+        self._commit = None
+        self._commit_thread = None
+        self._commit_worker = None
+        self.btn_commit.setEnabled(self.pseudonymizer is not None)
+        self.sleep_inhibitor.disable()
+
+    def _report_commit(self, s: CommitSession, result: CommitResult) -> None:
+        db_path = s.db_path
+        committed_files = result.committed_files
+        skipped = result.skipped
+        near_skipped = result.near_skipped
+        errors = result.errors
+        near_line = (
+            f"Skipped (near-duplicates): {len(near_skipped)}\n" if near_skipped else ""
+        )
 
-            # Write commit log (always; serves as audit trail)
-            log_note = ""
-            try:
-                log_path = self._write_commit_log(
-                    db_path, committed_files, skipped, errors,
-                )
-                if errors:
-                    log_note = f"\nCommit log: {log_path}"
-            except Exception:
-                pass  # Never fail the commit over a log write issue
+        if result.pool_error is not None:
+            # A worker died (e.g. crashed on a malformed PDF): the pool is unusable, replace it.
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = _make_executor()
+            self._error(self.tr("parallel_extract_failed", err=result.pool_error))
 
-            # Final report
-            summary = (
-                f"Commit finished.\n\n"
-                f"Committed: {len(committed_files)}\n"
+        if result.n_candidates == 0:
+            self._info(
+                f"No document to commit.\n\n"
                 f"Skipped (duplicates): {len(skipped)}\n"
-                f"Errors: {len(errors)}\n"
-                f"{pseudo_note}"
-                f"{log_note}"
+                f"{near_line}"
+                f"Errors: {len(errors)}"
             )
+            return
 
-            QMessageBox.information(
+        # -------------------------
+        # Pseudo-only copy (if requested)
+        # -------------------------
+        pseudo_note = ""
+        if result.pseudo_only_path is not None:
+            pseudo_note = self.tr(
+                "pseudo_only_copy_note", path=str(result.pseudo_only_path)
+            )
+        elif result.pseudo_only_error is not None:
+            QMessageBox.warning(
                 self,
-                self.tr("box_info"),
-                summary,
+                self.tr("pseudo_only_copy_failed_title"),
+                self.tr(
+                    "pseudo_only_copy_failed_after_commit",
+                    err=result.pseudo_only_error,
+                ),
             )
 
-            self.table.setRowCount(0)
-            self._set_message("info", summary)
-        finally:
-            self.sleep_inhibitor.disable()
+        # Write commit log (always; serves as audit trail), without delaying the report
+        self._log_pool.start(
+            CommitLogWriter(
+                self._write_commit_log,
+                db_path=db_path,
+                committed=committed_files,
+                skipped=skipped,
+                errors=errors,
+                near_skipped=near_skipped,
+                timestamp=datetime.now(),
+            )
+        )
+        log_note = f"\nCommit log: {self._commit_log_path(db_path)}" if errors else ""
+
+        # Final report
+        summary = (
+            f"Commit finished.\n\n"
+            f"Committed: {len(committed_files)}\n"
+            f"Skipped (duplicates): {len(skipped)}\n"
+            f"{near_line}"
+            f"Errors: {len(errors)}\n"
+            f"{pseudo_note}"
+            f"{log_note}"
+        )
 
-    def _flush_pending(
-        self,
-        db_path: str,
-        pending_rows: list[dict],
-        pending_names: list[str],
-        committed_files: list[str],
-        errors: list[str],
-    ) -> None:
-        """
-        Try to commit a chunk of rows to the DB.
-        If the chunk fails, fall back to row-by-row commits so that
-        one bad file does not prevent the rest from being saved.
-        Modifies *committed_files* and *errors* in-place.
-        """
-        if not pending_rows:
-            return
+        QMessageBox.information(
+            self,
+            self.tr("box_info"),
+            summary,
+        )
 
-        try:
-            append_rows_locked(db_path, pd.DataFrame(pending_rows))
-            committed_files.extend(pending_names)
-        except Exception:
-            # Chunk failed, try rows individually to salvage what we can
-            for row_dict, name in zip(pending_rows, pending_names):
-                try:
-                    append_rows_locked(db_path, pd.DataFrame([row_dict]))
-                    committed_files.append(name)
-                except Exception as row_err:
-                    errors.append(f"[Commit] {name}: {row_err}")
+        self.table.setRowCount(0)
+        self._table_paths.clear()
+        self._prewarm_jobs.clear()
+        self._set_message("info", summary)
+
+    def _commit_log_path(self, db_path: str) -> Path:
+        p = _resolved(db_path)
+        return p.with_name(f"{p.stem}_commit_log.txt")
 
     def _write_commit_log(
         self,
@@ -1167,39 +1733,31 @@ class MainWindow(QMainWindow):
         committed: list[str],
         skipped: list[str],
         errors: list[str],
+        near_skipped: list[str] | None = None,
+        timestamp: datetime | None = None,
     ) -> Path:
         """Append a timestamped commit summary to ``<db_stem>_commit_log.txt``."""
-        from datetime import datetime
-
-        p = Path(db_path).expanduser().resolve()
-        log_path = p.with_name(f"{p.stem}_commit_log.txt")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        lines = [
-            f"{'=' * 60}",
-            f"Commit, {timestamp}",
-            f"Database: {p}",
-            f"{'=' * 60}",
-            "",
-            f"Committed: {len(committed)} file(s)",
-        ]
-        for f in committed:
-            lines.append(f"  OK   {f}")
-        lines.append("")
-
-        lines.append(f"Skipped (duplicates): {len(skipped)} file(s)")
-        for f in skipped:
-            lines.append(f"  --   {f}")
-        lines.append("")
-
-        lines.append(f"Errors: {len(errors)}")
-        for e in errors:
-            lines.append(f"  ERR  {e}")
-        lines.append("")
-        lines.append("")
-
-        with open(log_path, "a", encoding="utf-8") as fh:
-            fh.write("\n".join(lines))
+        p = _resolved(db_path)
+        log_path = self._commit_log_path(db_path)
+        timestamp = (timestamp or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+        # Streamed section by section: no intermediate list/string proportional to the file count
+        with open(log_path, "a", encoding="utf-8", buffering=1 << 16) as fh:
+            fh.write(f"{'=' * 60}\nCommit, {timestamp}\nDatabase: {p}\n{'=' * 60}\n\n")
+
+            fh.write(f"Committed: {len(committed)} file(s)\n")
+            fh.writelines(f"  OK   {f}\n" for f in committed)
+
+            fh.write(f"\nSkipped (duplicates): {len(skipped)} file(s)\n")
+            fh.writelines(f"  --   {f}\n" for f in skipped)
+
+            if near_skipped:
+                fh.write(f"\nSkipped (near-duplicates): {len(near_skipped)} file(s)\n")
+                fh.writelines(f"  ~~   {f}\n" for f in near_skipped)
+
+            fh.write(f"\nErrors: {len(errors)}\n")
+            fh.writelines(f"  ERR  {e}\n" for e in errors)
+            fh.write("\n")
 
         return log_path
 
@@ -1212,46 +1770,41 @@ class MainWindow(QMainWindow):
         self._selection_mode = not self._selection_mode
 
         if self._selection_mode:
-            # Entering selection mode, add checkboxes to every row's column-0 item
+            # Entering selection mode, rows are (de)selected through the table's selection model
             self.btn_select_mode.setText(self.tr("btn_cancel_select"))
             self.chk_select_all.setVisible(True)
             self.btn_remove_selected.setVisible(True)
-            self.chk_select_all.setChecked(True)
 
-            for r in range(self.table.rowCount()):
-                it = self.table.item(r, 0)
-                if it is not None:
-                    it.setFlags(it.flags() | Qt.ItemIsUserCheckable)
-                    it.setCheckState(Qt.Checked)
+            with _updates_suspended(self.table):
+                self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+                self.table.setSelectionMode(QAbstractItemView.MultiSelection)
+                self.chk_select_all.setChecked(True)
+                self.table.selectAll()
         else:
-            # Leaving selection mode, strip checkboxes
+            # Leaving selection mode, restore the default cell selection
             self.btn_select_mode.setText(self.tr("btn_select_mode"))
             self.chk_select_all.setVisible(False)
             self.btn_remove_selected.setVisible(False)
 
-            for r in range(self.table.rowCount()):
-                it = self.table.item(r, 0)
-                if it is not None:
-                    it.setFlags(it.flags() & ~Qt.ItemIsUserCheckable)
-                    it.setData(Qt.CheckStateRole, None)
+            with _updates_suspended(self.table):
+                self.table.clearSelection()
+                self.table.setSelectionBehavior(QAbstractItemView.SelectItems)
+                self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
     def _toggle_select_all(self, state: int) -> None:
-        """Check or uncheck every row when the 'Select all' checkbox changes."""
+        """Select or clear every row when the 'Select all' checkbox changes."""
         if not self._selection_mode:
             return
-        target = Qt.Checked if state == Qt.Checked.value else Qt.Unchecked
-        for r in range(self.table.rowCount()):
-            it = self.table.item(r, 0)
-            if it is not None:
-                it.setCheckState(target)
+        if state == Qt.Checked.value:
+            self.table.selectAll()
+        else:
+            self.table.clearSelection()
 
     def _remove_selected(self) -> None:
-        """Remove rows whose checkbox is checked, after user confirmation."""
-        selected_rows = []
-        for r in range(self.table.rowCount()):
-            it = self.table.item(r, 0)
-            if it is not None and it.checkState() == Qt.Checked:
-                selected_rows.append(r)
+        """Remove selected rows, after user confirmation."""
+        selected_rows = sorted(
+            idx.row() for idx in self.table.selectionModel().selectedRows()
+        )
 
         if not selected_rows:
             self._info(self.tr("no_selection"))
@@ -1268,42 +1821,55 @@ class MainWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
 
-        # Remove from bottom to top so indices stay valid
-        for r in reversed(selected_rows):
-            self.table.removeRow(r)
+        for r in selected_rows:
+            path = self.table.item(r, 0).data(Qt.UserRole)
+            self._table_paths.discard(path)
+            fut = self._prewarm_jobs.pop(path, None)
+            if fut is not None:
+                fut.cancel()
+
+        # One removeRows call per contiguous run, from bottom to top so indices stay valid
+        model = self.table.model()
+        with _updates_suspended(self.table):
+            for first, count in reversed(_contiguous_runs(selected_rows)):
+                model.removeRows(first, count)
 
         # Leave selection mode after removal
         self._toggle_selection_mode()
 
     # ------------------------------------------------------------------
 
-    def _add_row(self, file_path: str):
-        r = self.table.rowCount()
-        self.table.insertRow(r)
-
-        fp_item = QTableWidgetItem(file_path)
-        fp_item.setFlags(fp_item.flags() ^ Qt.ItemIsEditable)
-        self.table.setItem(r, 0, fp_item)
-
-        # If currently in selection mode, give the new row a checkbox too
-        if self._selection_mode:
-            fp_item.setFlags(fp_item.flags() | Qt.ItemIsUserCheckable)
-            fp_item.setCheckState(Qt.Unchecked)
-
-        # IPP (auto, read-only)
-        ipp_item = QTableWidgetItem("—")
-        ipp_item.setFlags(ipp_item.flags() ^ Qt.ItemIsEditable)
-        self.table.setItem(r, 1, ipp_item)
-
-        # ORDER (auto, read-only)
-        order_item = QTableWidgetItem("—")
-        order_item.setFlags(order_item.flags() ^ Qt.ItemIsEditable)
-        self.table.setItem(r, 2, order_item)
-
-        preview_item = QTableWidgetItem("")
-        preview_item.setFlags(preview_item.flags() ^ Qt.ItemIsEditable)
-        self.table.setItem(r, 3, preview_item)
-
+    def _add_rows(self, files: list[tuple[str, str]]) -> int:
+        """
+        Append one row per (displayed path, resolved path), skipping paths already listed.
+        The resolved path is kept as Qt.UserRole data. Rows are allocated at once and
+        filled with updates suspended, so the table is laid out and repainted once.
+        Returns the number of rows added.
+        """
+        new_files = []
+        for file_path, resolved in files:
+            if resolved not in self._table_paths:
+                self._table_paths.add(resolved)
+                new_files.append((file_path, resolved))
+        if not new_files:
+            return 0
+
+        first = self.table.rowCount()
+        with _updates_suspended(self.table):
+            self.table.setRowCount(first + len(new_files))
+            for r, (file_path, resolved) in enumerate(new_files, start=first):
+                fp_item = QTableWidgetItem(file_path)
+                fp_item.setFlags(fp_item.flags() ^ Qt.ItemIsEditable)
+                fp_item.setData(Qt.UserRole, resolved)
+                self.table.setItem(r, 0, fp_item)
+                self._prewarm_jobs[resolved] = self._prewarm_pool.submit(_prewarm_file, resolved)
+
+                # IPP / ORDER (auto, read-only) and preview
+                for col, text in ((1, "—"), (2, "—"), (3, "")):
+                    item = QTableWidgetItem(text)
+                    item.setFlags(item.flags() ^ Qt.ItemIsEditable)
+                    self.table.setItem(r, col, item)
+        return len(new_files)
 
     def _set_preview(self, row: int, preview: str) -> None:
         it = self.table.item(row, 3)
@@ -1313,6 +1879,50 @@ class MainWindow(QMainWindow):
             self.table.setItem(row, 3, it)
         it.setText(preview)
 
+    def closeEvent(self, event) -> None:
+        if self._commit_thread is not None:
+            # Stop submitting new files and let the in-flight ones finish
+            self._commit_thread.requestInterruption()
+            self._commit_thread.quit()
+            self._commit_thread.wait()
+        self._log_pool.waitForDone()
+        self._settings_sync_timer.stop()
+        self.settings.sync()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._prewarm_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+
+    def purge_extract_cache(self) -> None:
+        """Delete the selected DB's extracted-text cache, after confirmation."""
+        if self._commit is not None:
+            self._error(self.tr("purge_during_commit"))
+            return
+        db_path = self.db_path_edit.text().strip()
+        if not db_path:
+            self._error(self.tr("please_select_db_first"))
+            return
+
+        path = extract_cache_path(_resolved(db_path))
+        reply = QMessageBox.question(
+            self,
+            self.tr("dlg_confirm_purge_title"),
+            self.tr("dlg_confirm_purge_body", path=path),
+            QMessageBox.Yes | QMessageBox.Cancel,
+            QMessageBox.Cancel,
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            purged = purge_cache(_resolved(db_path))
+        except Exception as e:
+            self._error(self.tr("purge_cache_failed", err=e))
+            return
+        if purged:
+            self._info(self.tr("cache_purged", path=path))
+        else:
+            self._info(self.tr("no_cache_to_purge"))
+
     def _info(self, message: str):
         QMessageBox.information(self, self.tr("box_info"), message)
         self._set_message("info", message)
@@ -1333,6 +1943,7 @@ def main():
         ),
     )
     args, qt_args = parser.parse_known_args()
+    mp.freeze_support()  # extraction workers of a frozen Windows build
     print("\nStarting application and loading EDS-PSEUDO, this may take a few minutes..")
     app = QApplication([sys.argv[0], *qt_args])
     w = MainWindow(eds_path=args.eds_path)
@@ -1,133 +1,257 @@
+import atexit
+import os
 import platform
+import shutil
 import subprocess
+import threading
 import ctypes
 import ctypes.util
 
+try:
+    import jeepney
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:
+    jeepney = None
+
+
+def _load_library(name: str):
+    """ctypes handle on the system library *name*, or None if it cannot be loaded."""
+    path = ctypes.util.find_library(name)
+    if path is None:
+        return None
+    try:
+        return ctypes.cdll.LoadLibrary(path)
+    except OSError:
+        return None
+
+
+# SetThreadExecutionState flags (Windows)
+_ES_CONTINUOUS = 0x80000000
+_ES_SYSTEM_REQUIRED = 0x00000001
+_ES_FLAGS_ON = _ES_CONTINUOUS | _ES_SYSTEM_REQUIRED
+# CoreFoundation / IOKit values (macOS)
+_CFSTR_UTF8 = 0x08000100  # kCFStringEncodingUTF8
+_IOPM_ON = 255  # kIOPMAssertionLevelOn
+
+# Never changes for the process; platform.system() may shell out to uname the first time
+_SYSTEM = platform.system()
+
+# Library handles are looked up once per process (find_library walks the search paths)
+_KERNEL32 = None
+_IOKIT = None
+_CF = None
+# Same for the absolute path of systemd-inhibit (None when not installed)
+_SYSTEMD_INHIBIT = None
+if _SYSTEM == "Windows":
+    _KERNEL32 = ctypes.windll.kernel32
+elif _SYSTEM == "Darwin":
+    _IOKIT = _load_library("IOKit")
+    _CF = _load_library("CoreFoundation")
+elif _SYSTEM == "Linux":
+    _SYSTEMD_INHIBIT = shutil.which("systemd-inhibit")
+
+# Prototypes: without them ctypes passes/returns C ints, which truncates the 64-bit
+# CFStringRef pointers returned by CFStringCreateWithCString.
+if _KERNEL32 is not None:
+    _KERNEL32.SetThreadExecutionState.argtypes = [ctypes.c_uint32]
+    _KERNEL32.SetThreadExecutionState.restype = ctypes.c_uint32
+if _CF is not None:
+    _CF.CFStringCreateWithCString.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_uint32]
+    _CF.CFStringCreateWithCString.restype = ctypes.c_void_p
+    _CF.CFRelease.argtypes = [ctypes.c_void_p]
+    _CF.CFRelease.restype = None
+if _IOKIT is not None:
+    _IOKIT.IOPMAssertionCreateWithName.argtypes = [
+        ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32),
+    ]
+    _IOKIT.IOPMAssertionCreateWithName.restype = ctypes.c_int32
+    _IOKIT.IOPMAssertionRelease.argtypes = [ctypes.c_uint32]
+    _IOKIT.IOPMAssertionRelease.restype = ctypes.c_int32
+
+# kIOPMAssertionTypeNoIdleSleep is a CFSTR() macro in IOPMLib.h, not an exported symbol:
+# the equivalent CFString is created once and kept for the life of the process.
+_NO_IDLE_SLEEP = None
+if _CF is not None:
+    _NO_IDLE_SLEEP = _CF.CFStringCreateWithCString(
+        None,
+        b"NoIdleSleepAssertion",
+        _CFSTR_UTF8,
+    )
+
+
+def _logind_inhibit(reason: str) -> int:
+    """
+    Take a logind 'sleep' inhibitor lock (org.freedesktop.login1.Manager.Inhibit) and
+    return its file descriptor; the lock is released when the FD is closed.
+    """
+    login1 = jeepney.DBusAddress(
+        "/org/freedesktop/login1",
+        bus_name="org.freedesktop.login1",
+        interface="org.freedesktop.login1.Manager",
+    )
+    msg = jeepney.new_method_call(
+        login1, "Inhibit", "ssss", ("sleep", "ClinicalDatabase", reason, "block")
+    )
+    with open_dbus_connection(bus="SYSTEM", enable_fds=True) as conn:
+        reply = conn.send_and_get_reply(msg, timeout=5)
+    if reply.header.message_type == jeepney.MessageType.error:
+        raise RuntimeError(f"logind Inhibit failed: {reply.body}")
+    return reply.body[0].to_raw_fd()
+
+
 class SleepInhibitor:
     """
     Prevents system sleep due to user inactivity while active.
 
     Windows  : SetThreadExecutionState
     macOS    : IOPMAssertionCreateWithName
-    Linux    : systemd-inhibit (if available)
+    Linux    : logind inhibitor lock over D-Bus (jeepney), else systemd-inhibit
+
+    Enables nest: the OS call is made by the outermost enable() and undone by the
+    matching disable(), so overlapping operations can each bracket their work with
+    `with inhibitor:`. SleepInhibitor.instance() returns a process-wide instance for
+    that purpose. While enabled, an atexit hook releases it, so the systemd-inhibit
+    child is reaped even if the application exits without calling disable().
     """
 
+    # Platform -> (enable, disable) method names
+    _IMPLS = {
+        "Windows": ("_enable_windows", "_disable_windows"),
+        "Darwin": ("_enable_macos", "_disable_macos"),
+        "Linux": ("_enable_linux", "_disable_linux"),
+    }
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
     def __init__(self, reason: str = "ClinicalDatabase processing"):
         self.reason = reason
-        self.system = platform.system()
-        self._active = False
+        self.system = _SYSTEM
+        self._depth = 0  # enable() calls not yet matched by disable()
+        self._lock = threading.Lock()
 
-        # Windows
-        self._kernel32 = None
+        # Bound once: enable()/disable() call them without dispatching on the platform
+        enable_name, disable_name = self._IMPLS.get(self.system, (None, None))
+        self._enable_impl = getattr(self, enable_name) if enable_name else None
+        self._disable_impl = getattr(self, disable_name) if disable_name else None
 
         # macOS
         self._assertion_id = ctypes.c_uint32(0)
 
         # Linux
-        self._linux_proc = None
+        self._inhibit_fd = None  # logind inhibitor lock (D-Bus)
+        self._linux_proc = None  # systemd-inhibit child (fallback)
+
+    @classmethod
+    def instance(cls) -> "SleepInhibitor":
+        """The process-wide SleepInhibitor (created on first use)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
 
     # -------------------------
     # Public API
     # -------------------------
     def enable(self):
-        if self._active:
-            return
+        with self._lock:
+            self._depth += 1
+            if self._depth > 1:
+                return
 
-        try:
-            if self.system == "Windows":
-                self._enable_windows()
-            elif self.system == "Darwin":
-                self._enable_macos()
-            elif self.system == "Linux":
-                self._enable_linux()
-        except Exception:
-            # Never fail hard because of power management
-            pass
+            try:
+                if self._enable_impl is not None:
+                    self._enable_impl()
+            except Exception:
+                # Never fail hard because of power management
+                pass
 
-        self._active = True
+            atexit.register(self._release)
 
     def disable(self):
-        if not self._active:
-            return
+        with self._lock:
+            if self._depth == 0:
+                return
+            self._depth -= 1
+            if self._depth == 0:
+                self._teardown()
+
+    def _release(self):
+        """Undo the OS call whatever the nesting depth (atexit hook)."""
+        with self._lock:
+            if self._depth:
+                self._depth = 0
+                self._teardown()
 
+    def _teardown(self):
         try:
-            if self.system == "Windows":
-                self._disable_windows()
-            elif self.system == "Darwin":
-                self._disable_macos()
-            elif self.system == "Linux":
-                self._disable_linux()
+            if self._disable_impl is not None:
+                self._disable_impl()
         except Exception:
             pass
 
-        self._active = False
+        atexit.unregister(self._release)
+
+    def __enter__(self) -> "SleepInhibitor":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.disable()
 
     # -------------------------
     # Windows
     # -------------------------
     def _enable_windows(self):
-        self._kernel32 = ctypes.windll.kernel32
-        ES_CONTINUOUS = 0x80000000
-        ES_SYSTEM_REQUIRED = 0x00000001
-        self._kernel32.SetThreadExecutionState(
-            ES_CONTINUOUS | ES_SYSTEM_REQUIRED
-        )
+        _KERNEL32.SetThreadExecutionState(_ES_FLAGS_ON)
 
     def _disable_windows(self):
-        ES_CONTINUOUS = 0x80000000
-        self._kernel32.SetThreadExecutionState(ES_CONTINUOUS)
+        _KERNEL32.SetThreadExecutionState(_ES_CONTINUOUS)
 
     # -------------------------
     # macOS
     # -------------------------
     def _enable_macos(self):
-        iokit = ctypes.cdll.LoadLibrary(
-            ctypes.util.find_library("IOKit")
-        )
-        cf = ctypes.cdll.LoadLibrary(
-            ctypes.util.find_library("CoreFoundation")
-        )
-
-        kIOPMAssertionTypeNoIdleSleep = cf.CFStringCreateWithCString(
-            None,
-            b"NoIdleSleepAssertion",
-            0x08000100,  # kCFStringEncodingUTF8
-        )
-
-        reason = cf.CFStringCreateWithCString(
+        reason = _CF.CFStringCreateWithCString(
             None,
             self.reason.encode("utf-8"),
-            0x08000100,
+            _CFSTR_UTF8,
         )
 
-        iokit.IOPMAssertionCreateWithName(
-            kIOPMAssertionTypeNoIdleSleep,
-            255,  # kIOPMAssertionLevelOn
-            reason,
-            ctypes.byref(self._assertion_id),
-        )
+        try:
+            _IOKIT.IOPMAssertionCreateWithName(
+                _NO_IDLE_SLEEP,
+                _IOPM_ON,
+                reason,
+                ctypes.byref(self._assertion_id),
+            )
+        finally:
+            # The assertion keeps its own reference to the string
+            if reason:  # CFRelease(NULL) crashes
+                _CF.CFRelease(reason)
 
     def _disable_macos(self):
-        iokit = ctypes.cdll.LoadLibrary(
-            ctypes.util.find_library("IOKit")
-        )
-        iokit.IOPMAssertionRelease(self._assertion_id)
+        _IOKIT.IOPMAssertionRelease(self._assertion_id)
 
     # -------------------------
     # Linux
     # -------------------------
     def _enable_linux(self):
+        # Ask logind directly for an inhibitor lock: held as long as its FD is open
+        if jeepney is not None:
+            try:
+                self._inhibit_fd = _logind_inhibit(self.reason)
+                return
+            except Exception:
+                pass  # no system bus / logind: fall back to systemd-inhibit
+
         # Use systemd-inhibit if available
-        if subprocess.call(
-            ["which", "systemd-inhibit"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        ) != 0:
+        if _SYSTEMD_INHIBIT is None:
             return
 
         self._linux_proc = subprocess.Popen(
             [
-                "systemd-inhibit",
+                _SYSTEMD_INHIBIT,
                 "--what=sleep",
                 "--why=" + self.reason,
                 "--mode=block",
@@ -139,6 +263,16 @@ class SleepInhibitor:
         )
 
     def _disable_linux(self):
-        if self._linux_proc:
-            self._linux_proc.terminate()
-            self._linux_proc = None
+        fd, self._inhibit_fd = self._inhibit_fd, None
+        if fd is not None:
+            os.close(fd)
+
+        proc, self._linux_proc = self._linux_proc, None
+        if proc is None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
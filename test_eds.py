@@ -1,22 +1,61 @@
 import os
 import sys
-import edsnlp
+import configparser
 import importlib
-import pkgutil
-from huggingface_hub import snapshot_download
 
 # --- CONFIGURATION ---
 cache_dir = os.path.join(os.getcwd(), "hf_cache")
+# Written once a download has completed (same marker as src/database/utils.py)
+complete_marker = os.path.join(cache_dir, ".complete")
+# Written once the snapshot's sources have been byte-compiled
+compiled_marker = os.path.join(cache_dir, ".compiled")
+model_path = os.path.join(cache_dir, "artifacts")
+
+# Thread pools sized before torch / tokenizers are imported (they read these once);
+# an explicit value in the environment still wins
+num_threads = max(1, (os.cpu_count() or 1) // 2)
+os.environ.setdefault("OMP_NUM_THREADS", str(num_threads))
+os.environ.setdefault("MKL_NUM_THREADS", str(num_threads))
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
 
 # --- STEP 1: DOWNLOAD ---
-# (We keep this to ensure files are present, but it will skip if already there)
 print(f"Checking model files in: {cache_dir} ...")
-snapshot_download(
-    repo_id="AP-HP/eds-pseudo-public", 
-    local_dir=cache_dir, 
-    local_dir_use_symlinks=False,  # This parameter is now ignored by new HF versions, but harmless to keep
-    ignore_patterns=["*.git*"] 
-)
+if os.path.exists(complete_marker):
+    # Files already there: no Hugging Face API round-trip, here or from edsnlp
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+else:
+    from filelock import FileLock  # installed with huggingface_hub
+    from huggingface_hub import snapshot_download
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # One run downloads; concurrent runs wait for it, then find the marker written
+    with FileLock(os.path.join(cache_dir, ".download.lock")):
+        if not os.path.exists(complete_marker):
+            if os.path.exists(compiled_marker):
+                os.remove(compiled_marker)  # new snapshot: compile it again
+            snapshot_download(
+                repo_id="AP-HP/eds-pseudo-public",
+                local_dir=cache_dir,
+                ignore_patterns=["*.git*"]
+            )
+            open(complete_marker, "w").close()
+
+if not os.path.exists(compiled_marker):
+    import compileall
+
+    # .pyc files for the whole snapshot, compiled in parallel, so that the imports
+    # below skip the parser even on a fresh download
+    if compileall.compile_dir(cache_dir, quiet=1, workers=0):
+        open(compiled_marker, "w").close()
+
+import edsnlp  # after HF_HUB_OFFLINE and the thread counts are set
+
+try:
+    import torch
+    torch.set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+except (ImportError, ValueError):
+    pass
 
 # --- STEP 2: FORCE LOAD CUSTOM MODULES ---
 # Add the cache folder to the system path
@@ -24,6 +63,24 @@ abs_cache_dir = os.path.abspath(cache_dir)
 if abs_cache_dir not in sys.path:
     sys.path.insert(0, abs_cache_dir)
 
+def iter_modules(root, prefix):
+    """
+    Yields (dotted name, source path) for every module and subpackage under a
+    package directory, using os.scandir only (no finders, no imports).
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir():
+                init = os.path.join(entry.path, "__init__.py")
+                # Regular subpackages only, like pkgutil.walk_packages
+                if entry.name.isidentifier() and os.path.exists(init):
+                    name = f"{prefix}.{entry.name}"
+                    yield name, init
+                    yield from iter_modules(entry.path, name)
+            elif entry.name.endswith(".py") and entry.name != "__init__.py":
+                if entry.name[:-3].isidentifier():
+                    yield f"{prefix}.{entry.name[:-3]}", entry.path
+
 def import_recursive(package_name):
     """
     Manually walks through a package and imports every submodule found.
@@ -38,43 +95,107 @@ def import_recursive(package_name):
         return
 
     # Walk through all sub-files and import them
-    if hasattr(package, "__path__"):
-        for _, name, _ in pkgutil.walk_packages(package.__path__, package_name + "."):
+    for root in getattr(package, "__path__", []):
+        for name, _ in iter_modules(root, package_name):
             try:
                 importlib.import_module(name)
                 # print(f"   -> Loaded submodule: {name}") # Uncomment to debug
             except Exception as e:
                 print(f"   ⚠️ Warning: Failed to load {name}: {e}")
 
+def config_factories(config_path):
+    """
+    Returns the `@factory` names declared in the pipeline config,
+    or None if the config cannot be read.
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            parser.read_file(f)
+    except (OSError, configparser.Error):
+        return None
+    return {
+        parser[section]["@factory"].strip().strip("\"'")
+        for section in parser.sections()
+        if "@factory" in parser[section]
+    }
+
+def import_factories(package_name, factories):
+    """
+    Imports only the submodules of a package whose source registers one of the
+    given factory names (found by a text scan, without compiling anything).
+    Returns False if one of the package's factories could not be located or
+    imported, in which case the caller falls back to import_recursive.
+    """
+    wanted = {f for f in factories if f.split(".")[0] == package_name}
+    try:
+        package = importlib.import_module(package_name)
+    except ImportError:
+        return False
+    if not wanted:
+        return True
+
+    found, modules = set(), []
+    for root in package.__path__:
+        top = (package_name, os.path.join(root, "__init__.py"))
+        for name, path in [top, *iter_modules(root, package_name)]:
+            try:
+                with open(path, encoding="utf-8", errors="ignore") as f:
+                    source = f.read()
+            except OSError:
+                continue
+            hits = {f for f in wanted if f'"{f}"' in source or f"'{f}'" in source}
+            if hits:
+                found |= hits
+                modules.append(name)
+    if found != wanted:
+        return False
+
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"   ⚠️ Warning: Failed to load {name}: {e}")
+            return False
+    print(f"✅ Imported {len(modules)} module(s) for {len(wanted)} {package_name} factories")
+    return True
+
 print("Registering custom components...")
-import_recursive("eds_pseudo")
+# Only the modules behind the factories the pipeline uses; everything if the
+# config cannot be mapped to modules
+factories = config_factories(os.path.join(model_path, "config.cfg"))
+if not factories or not import_factories("eds_pseudo", factories):
+    import_recursive("eds_pseudo")
 
 # --- STEP 3: LOAD PIPELINE ---
-model_path = os.path.join(cache_dir, "artifacts")
-
 print("\nLoading EDSNLP pipeline...")
 # We use auto_update=False because we are managing the download manually
 nlp = edsnlp.load(model_path, auto_update=False)
 
 # --- STEP 4: TEST ---
-text = (
+texts = [
     "En 2015, M. Charles-François-Bienvenu "
     "Myriel était évêque de Digne. C’était un vieillard "
     "d’environ soixante-quinze ans ; il occupait le "
     "siège de Digne depuis 2006."
-)
+]
 
-doc = nlp(text)
+# Same batched call as the pseudonymizer (src/database/pseudonymizer.py), in this
+# process: worker processes would not have the eds_pseudo factories registered above
+docs = list(nlp.pipe(texts, batch_size=32))
+doc = docs[0]
 
 print("\n" + "="*50)
 print("RESULTS")
 print("="*50)
 
-found_entities = False
-for ent in doc.ents:
-    found_entities = True
-    date_val = getattr(ent._, "date", "N/A")
-    print(f"Entity: {ent.text: <30} | Label: {ent.label_: <10} | Date: {date_val}")
+lines = [
+    f"Entity: {ent.text: <30} | Label: {ent.label_: <10} | Date: {getattr(ent._, 'date', 'N/A')}"
+    for ent in doc.ents
+]
+# One write for all the results
+sys.stdout.write("".join(line + "\n" for line in lines))
+found_entities = bool(lines)
 
 if not found_entities:
     print("No entities found (Check if the model logic is running correctly).")
\ No newline at end of file